@@ -0,0 +1,9 @@
+"""Sistema multiagente de gestión de residuos urbanos.
+
+Importar el paquete no abre ventanas ni construye el mundo: la simulación se
+crea con `build_simulation` y pygame solo se carga desde `residuos.render`.
+"""
+from .checkpoint import load_checkpoint, save_checkpoint
+from .simulation import Simulation, build_simulation
+
+__all__ = ['Simulation', 'build_simulation', 'load_checkpoint', 'save_checkpoint']
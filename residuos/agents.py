@@ -0,0 +1,592 @@
+"""Agentes de recolección, transporte y clasificación."""
+import math
+from collections import deque
+
+import numpy as np
+
+from .config import GREEN, RED
+from .eventlog import EventLog
+from .routing import plan_route, two_opt
+
+# Estados en los que un agente avanza por su ruta
+MOVING_STATES = frozenset({'moving_to_waste', 'moving_to_truck', 'moving_to_center', 'returning'})
+
+
+# Clase base para agentes
+class Agent:
+    def __init__(self, x, y, environment, name, speed=2):
+        self.environment = environment
+        # Posición y velocidad viven en las columnas compartidas del entorno
+        self.slot = environment.agent_store.add(x, y, speed)
+        self._state = None
+        self.name = name
+        # Ticks acumulados por estado, contabilizados en cada transición
+        self.state_ticks = {}
+        self.state_since = environment.tick
+        self.goal = None  # Destino en píxeles de la ruta actual
+        self.stalled = False  # Detenido porque el destino ha quedado inalcanzable
+
+    @property
+    def x(self):
+        return self.environment.agent_store.x[self.slot]
+
+    @x.setter
+    def x(self, value):
+        self.environment.agent_store.x[self.slot] = value
+
+    @property
+    def y(self):
+        return self.environment.agent_store.y[self.slot]
+
+    @y.setter
+    def y(self, value):
+        self.environment.agent_store.y[self.slot] = value
+
+    @property
+    def speed(self):
+        return self.environment.agent_store.speed[self.slot]
+
+    @speed.setter
+    def speed(self, value):
+        self.environment.agent_store.speed[self.slot] = value
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        if value != self._state:
+            self.environment.revision += 1
+        if self._state is not None:
+            now = self.environment.tick
+            self.state_ticks[self._state] = self.state_ticks.get(self._state, 0) + now - self.state_since
+            self.state_since = now
+        self._state = value
+        # El núcleo de movimiento por lotes solo avanza a los agentes en desplazamiento
+        self.environment.agent_store.moving[self.slot] = value in MOVING_STATES and not self.stalled
+
+    @property
+    def path(self):
+        """Waypoints pendientes de la ruta actual"""
+        return self.environment.agent_store.remaining_path(self.slot)
+
+    @path.setter
+    def path(self, waypoints):
+        self.environment.agent_store.set_path(self.slot, waypoints)
+
+    @property
+    def has_path(self):
+        return self.environment.agent_store.has_path(self.slot)
+
+    @property
+    def arrived(self):
+        """Ruta terminada (un agente detenido no ha llegado aunque no tenga ruta)"""
+        return not self.has_path and not self.stalled
+
+    @property
+    def distance_travelled(self):
+        return self.environment.agent_store.travelled(self.slot)
+
+    def state_durations(self):
+        """Ticks pasados en cada estado, incluido el estado actual"""
+        durations = dict(self.state_ticks)
+        durations[self._state] = durations.get(self._state, 0) + self.environment.tick - self.state_since
+        return durations
+
+    def move(self):
+        """Avanzar solo este agente; la simulación mueve a todos a la vez con AgentStore.advance"""
+        self.environment.agent_store.advance(np.array([self.slot]))
+
+    def distance(self, pos1, pos2):
+        return math.hypot(pos1[0] - pos2[0], pos1[1] - pos2[1])
+
+    def a_star_search(self, start, goal):
+        """Calcular la ruta con el servicio de búsqueda compartido del entorno"""
+        pathfinder = self.environment.pathfinder
+        path = pathfinder.find_path(start, goal, key=self.slot)
+        self.goal = goal
+        self.set_stalled(not path and pathfinder.node_of(start) != pathfinder.node_of(goal))
+        return path
+
+    def set_stalled(self, stalled):
+        """Detener al agente hasta que un cambio del mapa vuelva a abrirle camino"""
+        self.stalled = stalled
+        if stalled:
+            self.environment.stalled_agents.add(self)
+        else:
+            self.environment.stalled_agents.discard(self)
+        self.environment.agent_store.moving[self.slot] = self._state in MOVING_STATES and not stalled
+
+    def repair_path(self):
+        """Reparar la ruta actual tras un cambio del mapa; devuelve False si el destino es inalcanzable"""
+        path = self.environment.pathfinder.repair_path(self.slot, (self.x, self.y), self.goal)
+        self.set_stalled(path is None)
+        if path is not None:
+            self.path = path
+        return path is not None
+
+# Agente de Recolección
+class CollectionAgent(Agent):
+    def __init__(self, x, y, environment, name, speed=2, carry_capacity=1):
+        super().__init__(x, y, environment, name, speed)
+        self.state = 'idle'  # 'idle', 'moving_to_waste', 'collecting', 'moving_to_truck', 'delivering', 'waiting_for_truck'
+        self.target = None
+        self.collected_waste = []
+        self.truck = None  # Camión asignado por la estación central
+        self.carry_capacity = carry_capacity  # Residuos que lleva encima antes de ir al camión
+        self.tour = []  # Residuos reservados por recoger, en orden de visita; el primero es el objetivo
+        self.deliveries = 0  # Entregas al camión
+
+    def perceive(self):
+        # Los residuos disponibles se consultan en el índice espacial del entorno
+        # y los camiones libres al despachador de la estación central.
+        # Percibe el estado del camión asignado
+        self.transport_state = self.truck.state if self.truck is not None else None
+
+    def request_truck(self):
+        """Pedir un camión al despachador e ir a su base, o esperar si no hay ninguno libre"""
+        self.truck = self.environment.central_station.assign_truck(self)
+        if self.truck is not None:
+            self.path = self.a_star_search((self.x, self.y), self.truck.home)
+            self.state = 'moving_to_truck'
+        else:
+            self.state = 'waiting_for_truck'
+
+    def assign(self, target):
+        """Reservar un residuo e ir a por él; con capacidad de sobra, planificar un recorrido por varios"""
+        self.environment.reserve_waste(target)  # Reserva el punto de residuo
+        self.tour = [target]
+        self.extend_tour()
+        self.visit_next()
+
+    def extend_tour(self):
+        """Completar el recorrido con los residuos más cercanos en cadena y mejorarlo con 2-opt"""
+        environment = self.environment
+        room = self.carry_capacity - len(self.collected_waste) - len(self.tour)
+        if room <= 0:
+            return
+        last = self.tour[-1]
+        added = False
+        for _ in range(room):
+            point = environment.waste_index.nearest(last.x, last.y)
+            if point is None:
+                break
+            environment.reserve_waste(point)
+            self.tour.append(point)
+            last = point
+            added = True
+        if added:
+            # El recorrido termina en la base del camión más cercano al último residuo
+            homes = [truck.home for truck in environment.central_station.transport_agents]
+            end = min(homes, key=lambda home: math.hypot(home[0] - last.x, home[1] - last.y)) if homes else None
+
+            def cost(a, b):
+                a = a if isinstance(a, tuple) else (a.x, a.y)
+                b = b if isinstance(b, tuple) else (b.x, b.y)
+                return math.hypot(a[0] - b[0], a[1] - b[1])
+
+            self.tour = two_opt((self.x, self.y), self.tour, end, cost)
+
+    def visit_next(self):
+        """Ir al siguiente residuo del recorrido"""
+        self.target = self.tour[0]
+        # Calcula la ruta utilizando A*
+        self.path = self.a_star_search((self.x, self.y), (self.target.x, self.target.y))
+        self.state = 'moving_to_waste'
+
+    def drop_target(self):
+        """Abandonar el residuo objetivo (ya liberado) y quedar libre"""
+        self.target = None
+        self.tour = []
+        self.path = []
+        self.state = 'idle'
+
+    def decide(self):
+        if self.state == 'idle':
+            # Selecciona el residuo más cercano no reservado (si la simulación no
+            # reparte los residuos en lote antes, con un BatchAssigner)
+            target = self.environment.waste_index.nearest(self.x, self.y)
+            if target is not None:
+                self.assign(target)
+
+        elif self.state == 'moving_to_waste' and self.arrived:
+            self.state = 'collecting'
+
+        elif self.state == 'collecting':
+            self.environment.collect_waste(self.target)
+            self.collected_waste.append(self.target)
+            log = self.environment.log
+            if log.enabled:
+                log.info('pickup', "{agent} recogió un residuo de tipo {waste_type}.",
+                         agent=self.name, waste_type=self.target.waste_type)
+            self.tour.pop(0)
+            self.target = None
+            if self.tour:
+                # Siguiente parada del recorrido
+                self.visit_next()
+            else:
+                # Después de recolectar, ir al camión libre más cercano
+                self.request_truck()
+
+        elif self.state == 'waiting_for_truck':
+            if self.truck is None:
+                # Espera hasta que algún camión tenga capacidad libre
+                self.request_truck()
+            elif self.transport_state == 'waiting':
+                # El camión asignado ha vuelto a su base
+                self.state = 'delivering'
+
+        elif self.state == 'moving_to_truck' and self.arrived:
+            # Solo entrega si el camión está en su base; si no, lo espera allí
+            self.state = 'delivering' if self.transport_state == 'waiting' else 'waiting_for_truck'
+
+        elif self.state == 'delivering':
+            # Entrega los residuos al camión
+            transport_agent = self.truck
+            self.environment.central_station.release_truck(transport_agent, len(self.collected_waste))
+            self.truck = None
+            if transport_agent.receive_waste(self.collected_waste):
+                log = self.environment.log
+                if log.enabled:
+                    log.info('handover', "{agent} entregó {count} residuos al camión.",
+                             agent=self.name, count=len(self.collected_waste))
+                self.collected_waste = []
+                self.deliveries += 1
+                self.state = 'idle'
+            else:
+                self.request_truck()
+
+    def act(self):
+        if self.state in ['moving_to_waste', 'moving_to_truck']:
+            self.move()
+
+# Agente de Transporte
+class TransportAgent(Agent):
+    def __init__(self, x, y, environment, capacity, name="TransportAgent", speed=2):
+        super().__init__(x, y, environment, name, speed)
+        self.state = 'waiting'  # Estados posibles: 'waiting', 'moving_to_center', 'returning'
+        self.capacity = capacity  # Capacidad máxima del camión
+        self.current_load = 0  # Residuos recogidos
+        self.reserved_load = 0  # Capacidad reservada por recolectores en camino
+        self.departure_requested = False  # Algún recolector no cabe: salir con la carga parcial
+        self.collected_waste = []  # Lista de residuos actuales
+        self.home = self.environment.pathfinder.snap((x, y))  # Posición de espera (en la red, si la hay)
+        self.x, self.y = self.home
+        self.environment.pathfinder.add_destination(self.home)
+        self.environment.central_station.register_transport_agent(self)  # Registra el camión en la estación central
+        self.target_centers = []  # Centros a visitar
+        self.current_center_index = 0  # Índice del centro objetivo
+
+        # Métricas de utilización
+        self.trips = 0
+        self.items_received = 0
+        self.items_loaded_on_trips = 0
+        self.blocked_ticks = 0  # Ticks esperando en un centro a que haya sitio en la cola de clasificación
+
+    def free_capacity(self):
+        """Capacidad libre descontando la reservada por recolectores en camino.
+
+        Fuera de su base el camión vuelve vacío, así que se reserva para la
+        próxima carga y los recolectores lo esperan en la base.
+        """
+        load = self.current_load if self.state == 'waiting' else 0
+        return self.capacity - load - self.reserved_load
+
+    def deliver_waste_to_station(self):
+        """Entregar residuos a la estación central"""
+        self.environment.central_station.assign_waste_to_classification(self.collected_waste)
+        log = self.environment.log
+        if log.enabled:
+            log.info('station_delivery', "{agent} entregó {count} residuos a la estación central.",
+                     agent=self.name, count=len(self.collected_waste))
+        self.collected_waste = []
+        self.current_load = 0
+
+        # Obtener el agente de clasificación asociado a cada tipo de residuo entregado
+        delivered_types = set(waste.waste_type for waste in self.collected_waste)
+        for waste_type in delivered_types:
+            classification_agent = self.get_classification_agent_by_type(waste_type)
+            if classification_agent:
+                # Verificar si se entregaron residuos
+                if any(waste.waste_type == waste_type for waste in self.collected_waste):
+                    classification_agent.trigger_blink(success=True)
+                else:
+                    classification_agent.trigger_blink(success=False)
+
+    def get_classification_agent(self, center):
+        """Obtener el agente clasificador asociado a un centro específico"""
+        return self.environment.central_station.classifiers_by_center.get(center)
+
+    def perceive(self):
+        """Percibir el entorno y actualizar el estado"""
+
+        if self.state == 'waiting' and self.current_load > 0 and (
+                self.current_load == self.capacity or self.departure_requested or self.nothing_left_to_load()):
+            # Inicia la visita a los centros de tratamiento
+            self.plan_trip()
+
+        elif self.state == 'moving_to_center' and self.arrived:
+            # Llega al centro de tratamiento
+            self.state = 'delivering'
+
+        elif self.state == 'delivering':
+            # Entregar residuos a los clasificadores
+            if self.current_center_index >= len(self.target_centers):
+                self.environment.log.warning('no_more_centers', "Error: No hay más centros para visitar.")
+                self.state = 'returning'
+                return
+
+            current_center = self.target_centers[self.current_center_index]
+            classification_agent = self.get_classification_agent(current_center)
+            
+            # Filtrar residuos para el centro actual
+            wastes_for_center = [
+                waste for waste in self.collected_waste if waste.waste_type == current_center.waste_type
+            ]
+            if wastes_for_center:
+                # Solo se entrega lo que cabe en la cola del clasificador; el resto espera en el camión
+                room = classification_agent.room(len(wastes_for_center))
+                accepted = wastes_for_center[:room]
+                held = wastes_for_center[room:]
+                if not accepted:
+                    self.blocked_ticks += 1
+                    return
+                # Asignar residuos al agente clasificador
+                self.environment.central_station.assign_waste_to_classification(accepted)
+                # Remover residuos ya entregados
+                self.collected_waste = [
+                    waste for waste in self.collected_waste if waste.waste_type != current_center.waste_type
+                ] + held
+                self.current_load = len(self.collected_waste)
+
+                log = self.environment.log
+                if log.enabled:
+                    log.info('center_delivery', "{agent} entregó residuos al centro de tratamiento {waste_type}.",
+                             agent=self.name, waste_type=current_center.waste_type, count=len(accepted))
+                
+                # Notificar al ClassificationAgent que la entrega fue exitosa
+                classification_agent.trigger_blink(success=True)
+                if held:
+                    # Contrapresión del centro: el camión espera allí a entregar el resto
+                    self.blocked_ticks += 1
+                    return
+        
+            else:
+                log = self.environment.log
+                if log.enabled:
+                    log.debug('center_empty', "No hay residuos de tipo {waste_type} para entregar al centro de tratamiento.",
+                              waste_type=current_center.waste_type)
+                
+                # Notificar al ClassificationAgent que no hubo residuos para entregar
+                classification_agent.trigger_blink(success=False)
+
+            
+            # Si aún quedan residuos, ir al siguiente centro del recorrido
+            if self.current_load > 0 and self.current_center_index < len(self.target_centers) - 1:
+                self.current_center_index += 1
+                self.visit_next_center()
+            else:
+                # Regresa al punto inicial
+                self.path = self.a_star_search((self.x, self.y), self.home)
+                self.state = 'returning'
+
+        elif self.state == 'returning' and self.arrived:
+            # Regresa al estado de espera
+            self.state = 'waiting'
+
+    def receive_waste(self, waste):
+        """Recibir residuos en el camión; devuelve False si no caben"""
+        total_items = self.current_load + len(waste)
+        if total_items <= self.capacity:
+            self.collected_waste.extend(waste)
+            self.current_load = total_items
+            self.items_received += len(waste)
+            log = self.environment.log
+            if log.enabled:
+                for w in waste:
+                    log.debug('truck_received', "{agent} recibió residuo de tipo {waste_type}.",
+                              agent=self.name, waste_type=w.waste_type)
+                log.info('truck_load', "Carga actual: {load}/{capacity}",
+                         agent=self.name, load=self.current_load, capacity=self.capacity)
+            # Si alcanza la capacidad máxima, iniciar el proceso de entrega
+            if self.current_load == self.capacity:
+                self.plan_trip()
+            return True
+        self.environment.log.warning('truck_full', "El camión alcanzó su capacidad máxima y no puede cargar más residuos.")
+        return False
+
+    def request_departure(self):
+        """Salir hacia los centros con la carga parcial: hay recolectores cuya carga ya no cabe"""
+        if not self.departure_requested:
+            self.departure_requested = True
+            self.environment.revision += 1
+
+    def nothing_left_to_load(self):
+        """No quedan residuos por recoger ni recolectores en camino hacia este camión"""
+        return self.reserved_load == 0 and self.environment.pending_waste() == 0
+
+    def plan_trip(self):
+        """Salir hacia los centros con residuos a bordo, en el orden de menor coste de viaje"""
+        self.trips += 1
+        self.items_loaded_on_trips += self.current_load
+        self.departure_requested = False
+
+        on_board = {waste.waste_type for waste in self.collected_waste}
+        stops = [center for center in self.environment.centers if center.waste_type in on_board]
+        pathfinder = self.environment.pathfinder
+
+        def cost(a, b):
+            a = a if isinstance(a, tuple) else (a.x, a.y)
+            b = b if isinstance(b, tuple) else (b.x, b.y)
+            return pathfinder.travel_cost(a, b)
+
+        self.target_centers = plan_route((self.x, self.y), stops, self.home, cost)
+        self.current_center_index = 0
+        self.visit_next_center()
+
+    def act(self):
+        """Actuar según el estado actual"""
+        if self.state in ['moving_to_center', 'returning']:
+            self.move()
+
+    def visit_next_center(self):
+        """Moverse al siguiente centro de tratamiento"""
+        if self.current_center_index < len(self.target_centers):
+            next_center = self.target_centers[self.current_center_index]
+            self.path = self.a_star_search((self.x, self.y), (next_center.x, next_center.y))
+            self.state = 'moving_to_center'
+        else:
+            self.environment.log.warning('center_index_error', "Error: Índice del centro de tratamiento fuera de rango.")
+            self.state = 'returning'
+
+    def get_classification_agent_by_type(self, waste_type):
+        """Obtener el agente clasificador asociado a un tipo de residuo"""
+        return self.environment.central_station.classifiers_by_type.get(waste_type)
+    
+# Agentes de Clasificación
+class ClassificationAgent:
+    """Clasificador de un centro: cola acotada atendida a un ritmo fijo.
+
+    Los camiones dejan residuos en la cola (`receive_waste`) mientras haya
+    sitio (`room`), que descuenta también lo que el centro ya no puede
+    aceptar; cada tick se clasifican hasta `service_rate` residuos (puede
+    ser fraccionario: el crédito se acumula mientras hay cola) y se
+    depositan de una vez en el centro. Sin `service_rate` se clasifica todo
+    lo recibido en el mismo tick. Un centro lleno ya no frena a los
+    camiones: lo que le llega se descarta al depositar, como sin cola.
+    """
+    def __init__(self, name, x, y, associated_center, color, log=None, service_rate=None, queue_capacity=None):
+        self.log = log if log is not None else EventLog.disabled()
+        self.received_waste = deque()  # Cola de residuos por clasificar, en orden de llegada
+        self.name = name
+        self.color = color
+        self.original_color = color  # Guardar el color original
+        self.x = x
+        self.y = y
+        self.associated_center = associated_center 
+        self.service_rate = service_rate  # Residuos clasificados por tick (None: sin límite)
+        self.queue_capacity = queue_capacity  # Tamaño máximo de la cola (None: sin límite)
+        self.credit = 0.0  # Servicio acumulado aún no convertido en residuos clasificados
+
+        # Métricas de rendimiento
+        self.classified = 0  # Residuos depositados en el centro
+        self.discarded = 0  # Residuos descartados por llegar con el centro lleno
+        self.busy_ticks = 0  # Ticks con cola al empezar el servicio
+        self.queue_ticks = 0  # Suma de la longitud de la cola al cerrar cada tick
+        self.max_queue = 0
+        
+        # Parámetros para el parpadeo
+        self.blink = False
+        self.blink_color = color
+        self.blink_timer = 0
+        self.blink_interval = 200  # Intervalo de parpadeo en milisegundos
+        self.blink_duration = 1000  # Duración total del parpadeo en milisegundos
+        self.last_blink_time = 0
+
+    def room(self, wanted):
+        """Cuántos de `wanted` residuos se pueden encolar ahora, según la cola y lo que le queda al centro.
+
+        El límite del centro solo se aplica mientras no esté lleno: después
+        la cola se sigue vaciando (descartando) y no puede bloquear a nadie.
+        """
+        queued = len(self.received_waste)
+        room = wanted
+        center = self.associated_center
+        if center.received_count < center.capacity:
+            room = min(room, center.capacity - center.received_count - queued)
+        if self.queue_capacity is not None:
+            room = min(room, self.queue_capacity - queued)
+        return max(room, 0)
+
+    def receive_waste(self, waste_list):
+        self.received_waste.extend(waste_list)
+        if len(self.received_waste) > self.max_queue:
+            self.max_queue = len(self.received_waste)
+    
+    def classify_waste(self):
+        """Atender la cola durante un tick y depositar el lote clasificado en el centro"""
+        queue = self.received_waste
+        if not queue:
+            return
+        self.busy_ticks += 1
+        if self.service_rate is None:
+            count = len(queue)
+        else:
+            self.credit += self.service_rate
+            count = min(int(self.credit), len(queue))
+            self.credit -= count
+        batch = [queue.popleft() for _ in range(count)]
+        if batch:
+            log = self.log
+            if log.enabled:
+                for waste in batch:
+                    log.debug('classifying', "{agent} clasificando residuo {waste_type} de peso {weight} en posición ({x}, {y})",
+                              agent=self.name, waste_type=waste.waste_type, weight=waste.weight, x=waste.x, y=waste.y)
+            self.deposit_waste(batch)
+        if not queue:
+            # Sin cola el servicio se detiene: el crédito sobrante no se guarda
+            self.credit = 0.0
+        self.queue_ticks += len(queue)
+
+    def deposit_waste(self, batch):
+        """Depositar un lote de residuos en el centro asociado; lo que no cabe se descarta"""
+        stored = self.associated_center.store_batch(batch)
+        self.classified += stored
+        self.discarded += len(batch) - stored
+        log = self.log
+        if log.enabled:
+            if stored:
+                log.debug('deposit', "{agent} depositó {count} residuos en el centro {center}.",
+                          agent=self.name, count=stored, center=self.associated_center.waste_type)
+            if stored < len(batch):
+                log.warning('center_full', "El centro {center} está lleno y no puede recibir más residuos.",
+                            center=self.associated_center.waste_type)
+
+    def trigger_blink(self, success):
+        """Iniciar el parpadeo basado en el éxito de la entrega"""
+        self.blink = True
+        self.blink_color = GREEN if success else RED
+        self.blink_timer = self.blink_duration
+        self.last_blink_time = None  # Se fija al dibujar, la simulación no depende del reloj
+
+    def update_blink(self, current_time):
+        """Actualizar el estado del parpadeo con el reloj del renderizador (en milisegundos)"""
+        if self.blink:
+            if self.last_blink_time is None:
+                self.last_blink_time = current_time
+            elapsed = current_time - self.last_blink_time
+
+            if elapsed >= self.blink_interval:
+                # Alternar el color entre el color de parpadeo y el color original
+                if self.blink_color == self.original_color:
+                    self.blink_color = GREEN if self.blink_color == GREEN else RED
+                else:
+                    self.blink_color = self.original_color
+
+                self.last_blink_time = current_time
+                self.blink_timer -= self.blink_interval
+
+                if self.blink_timer <= 0:
+                    self.blink = False
+                    self.blink_color = self.original_color
@@ -0,0 +1,138 @@
+"""Generación continua de residuos: llegadas de Poisson o a partir de una traza."""
+import csv
+import math
+import random
+
+from .store import WASTE_TYPES
+
+
+class PoissonArrivals:
+    """Residuos que aparecen según un proceso de Poisson de `rate` llegadas por tick.
+
+    Posición y tipo se sortean como en el reparto inicial del entorno (en los
+    nodos si hay red viaria), con un generador propio para que las llegadas
+    no alteren la secuencia aleatoria del resto de la simulación.
+    """
+    CHUNK = 30  # Tasa máxima por tramo del método de Knuth (evita que exp(-tasa) se anule)
+
+    def __init__(self, rate, seed=None):
+        if rate < 0:
+            raise ValueError("La tasa de llegadas no puede ser negativa")
+        self.rate = rate
+        # Semilla distinta de la del entorno aunque se parta del mismo entero
+        self.rng = random.Random(None if seed is None else f"arrivals:{seed}")
+        # Sorteos adelantados por `next_arrival`: ticks anteriores a `horizon` ya
+        # sorteados y, si lo hay, el próximo (tick, llegadas) con alguna llegada
+        self.horizon = None
+        self.due = None
+
+    def count(self):
+        """Número de llegadas en un tick"""
+        total = 0
+        remaining = self.rate
+        while remaining > 0:
+            chunk = min(remaining, self.CHUNK)
+            remaining -= chunk
+            limit = math.exp(-chunk)
+            product = self.rng.random()
+            while product > limit:
+                total += 1
+                product *= self.rng.random()
+        return total
+
+    def exhausted(self):
+        """Un proceso de Poisson con tasa positiva nunca se agota"""
+        return self.rate == 0
+
+    def next_arrival(self, tick, end):
+        """Primer tick en [tick, end) con alguna llegada, o None.
+
+        Sortea por adelantado los ticks vacíos en el mismo orden en que lo
+        haría `__call__`, así que la secuencia de llegadas no cambia.
+        """
+        if self.due is not None:
+            return self.due[0] if self.due[0] < end else None
+        start = tick if self.horizon is None else max(tick, self.horizon)
+        if self.rate > self.CHUNK:
+            draw = self.count
+        else:
+            # Un solo tramo: un tick queda vacío si el primer sorteo no supera el límite
+            limit = math.exp(-self.rate)
+            random = self.rng.random
+
+            def draw():
+                product = random()
+                count = 0
+                while product > limit:
+                    count += 1
+                    product *= random()
+                return count
+        for ahead in range(start, end):
+            count = draw()
+            if count:
+                self.due = (ahead, count)
+                self.horizon = ahead + 1
+                return ahead
+        self.horizon = max(start, end)
+        return None
+
+    def __call__(self, environment, tick):
+        """Añadir al entorno los residuos que llegan en este tick"""
+        if self.horizon is not None and tick < self.horizon:
+            # Tick ya sorteado por `next_arrival`
+            if self.due is None or self.due[0] != tick:
+                return
+            count = self.due[1]
+            self.due = None
+        else:
+            self.horizon = None
+            count = self.count()
+        for _ in range(count):
+            environment.add_waste(*environment.random_waste(self.rng))
+
+
+class TraceArrivals:
+    """Residuos que aparecen en los ticks indicados por una traza.
+
+    Cada evento es (tick, x, y, tipo) o (tick, x, y, tipo, peso); los eventos
+    se ordenan por tick y se consumen con un cursor, sin copiar la traza.
+    """
+    def __init__(self, events):
+        self.events = sorted(events, key=lambda event: event[0])
+        for event in self.events:
+            if event[3] not in WASTE_TYPES:
+                raise ValueError(f"Tipo de residuo desconocido en la traza: {event[3]!r}")
+        self.position = 0
+
+    @classmethod
+    def load_csv(cls, path):
+        """Leer una traza CSV con columnas tick, x, y, waste_type y, opcionalmente, weight"""
+        events = []
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.DictReader(handle):
+                events.append((
+                    int(row['tick']),
+                    round(float(row['x'])),
+                    round(float(row['y'])),
+                    row['waste_type'],
+                    float(row.get('weight') or 1),
+                ))
+        return cls(events)
+
+    def exhausted(self):
+        """Indica si ya no quedan eventos por llegar"""
+        return self.position >= len(self.events)
+
+    def next_arrival(self, tick, end):
+        """Primer tick en [tick, end) con algún evento de la traza, o None"""
+        if self.exhausted():
+            return None
+        due = max(tick, self.events[self.position][0])
+        return due if due < end else None
+
+    def __call__(self, environment, tick):
+        """Añadir al entorno los residuos de la traza hasta este tick"""
+        events = self.events
+        while self.position < len(events) and events[self.position][0] <= tick:
+            environment.add_waste(*events[self.position][1:])
+            self.position += 1
@@ -0,0 +1,180 @@
+"""Asignación conjunta de residuos a los recolectores libres."""
+import math
+
+import numpy as np
+
+# Hasta este número de recolectores por grupo se resuelve la asignación exacta
+EXACT_LIMIT = 48
+# Residuos candidatos más cercanos por recolector
+CANDIDATES = 8
+# Recolectores en camino que entran en el lote junto a los libres
+NEIGHBOURS = 12
+# Penalización (píxeles) por cambiar el objetivo de un recolector que ya está en camino
+SWITCH_PENALTY = 40
+
+
+def hungarian(cost):
+    """Asignación de coste mínimo (algoritmo húngaro con potenciales, O(n² m)).
+
+    `cost` es una matriz n x m; se asigna cada fila a una columna distinta si
+    n <= m (o cada columna a una fila si n > m). Devuelve los pares
+    (fila, columna) ordenados por fila.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    n, m = cost.shape
+    if n > m:
+        return sorted((row, col) for col, row in hungarian(cost.T))
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # Fila (desde 1) asignada a cada columna; 0 si ninguna
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, math.inf)
+        used = np.zeros(m + 1, dtype=np.bool_)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], math.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        # Deshacer el camino aumentante
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    return sorted((int(owner[j]) - 1, j - 1) for j in range(1, m + 1) if owner[j])
+
+
+def partition(agents, limit):
+    """Grupos espaciales de a lo sumo `limit` agentes (cortes por la mediana del eje más largo)"""
+    if len(agents) <= limit:
+        return [agents]
+    xs = [float(agent.x) for agent in agents]
+    ys = [float(agent.y) for agent in agents]
+    axis = 0 if max(xs) - min(xs) >= max(ys) - min(ys) else 1
+    ordered = sorted(agents, key=lambda agent: (float(agent.x), float(agent.y)) if axis == 0
+                     else (float(agent.y), float(agent.x)))
+    half = len(ordered) // 2
+    return partition(ordered[:half], limit) + partition(ordered[half:], limit)
+
+
+class BatchAssigner:
+    """Reparto de residuos a todos los recolectores libres a la vez, una vez por tick.
+
+    Minimiza la distancia total (euclídea) de cada grupo con el algoritmo
+    húngaro, sobre los `candidates` residuos disponibles más cercanos a cada
+    agente (la matriz es densa, así que todos reciben uno si hay bastantes).
+    En el lote entran también hasta `neighbours` recolectores que ya van
+    hacia un residuo, de modo que uno que acaba de quedar libre puede
+    quedarse con el objetivo cercano de otro que venía de lejos; cambiar de
+    objetivo cuesta `switch_penalty` píxeles para no replanificar por
+    empates. Con más de
+    `exact_limit` agentes se reparten en grupos espaciales que se resuelven
+    uno tras otro (aproximación).
+    """
+    def __init__(self, exact_limit=EXACT_LIMIT, candidates=CANDIDATES, neighbours=NEIGHBOURS,
+                 switch_penalty=SWITCH_PENALTY):
+        self.exact_limit = exact_limit
+        self.candidates = candidates
+        self.neighbours = neighbours
+        self.switch_penalty = switch_penalty
+        self.batches = 0
+        self.assigned = 0
+        self.switches = 0  # Recolectores en camino que cambiaron de objetivo
+
+    def groups(self, idle, moving):
+        """Grupos a resolver: los libres con los recolectores en camino más próximos a ellos.
+
+        Si los libres caben en un grupo se completa con hasta `neighbours`
+        recolectores en camino, los más cercanos a alguno de ellos; si no, se
+        parte todo el conjunto por el espacio y se descartan los grupos sin
+        ningún recolector libre.
+        """
+        if len(idle) > self.exact_limit:
+            return [group for group in partition(idle + moving, self.exact_limit)
+                    if any(agent.state == 'idle' for agent in group)]
+        room = min(self.neighbours, self.exact_limit - len(idle))
+        if not moving or not room:
+            return [idle]
+        idle_x = np.array([agent.x for agent in idle], dtype=np.float64)
+        idle_y = np.array([agent.y for agent in idle], dtype=np.float64)
+        moving_x = np.array([agent.x for agent in moving], dtype=np.float64)
+        moving_y = np.array([agent.y for agent in moving], dtype=np.float64)
+        gap = np.hypot(moving_x[:, None] - idle_x[None, :], moving_y[:, None] - idle_y[None, :]).min(axis=1)
+        nearest = np.argsort(gap, kind='stable')[:room]
+        return [idle + [moving[i] for i in nearest.tolist()]]
+
+    def __call__(self, environment, agents):
+        """Asignar residuo a los recolectores en estado 'idle'; devuelve cuántos se asignaron"""
+        idle = [agent for agent in agents if agent.state == 'idle']
+        if not idle:
+            return 0
+        moving = []
+        if self.neighbours:
+            # Un recorrido de varios residuos ya comprometido no se deshace
+            moving = [agent for agent in agents
+                      if agent.state == 'moving_to_waste' and not agent.stalled and len(agent.tour) == 1]
+        index = environment.waste_index
+        if not len(index) and not moving:
+            return 0
+        self.batches += 1
+        assigned = 0
+        for group in self.groups(idle, moving):
+            candidates = {agent.target: None for agent in group if agent.target is not None}
+            # A los que ya van de camino les basta con unas pocas alternativas cerca
+            k_idle = min(len(group), self.candidates)
+            k_moving = min(len(group), max(1, self.candidates // 4))
+            for agent in group:
+                k = k_idle if agent.target is None else k_moving
+                for point in index.k_nearest(agent.x, agent.y, k):
+                    candidates.setdefault(point, None)
+            points = list(candidates)
+            if not points:
+                continue
+            agent_x = np.array([agent.x for agent in group], dtype=np.float64)
+            agent_y = np.array([agent.y for agent in group], dtype=np.float64)
+            point_x = np.array([point.x for point in points], dtype=np.float64)
+            point_y = np.array([point.y for point in points], dtype=np.float64)
+            cost = np.hypot(agent_x[:, None] - point_x[None, :], agent_y[:, None] - point_y[None, :])
+            column = {point: col for col, point in enumerate(points)}
+            for row, agent in enumerate(group):
+                if agent.target is not None:
+                    cost[row] += self.switch_penalty
+                    cost[row, column[agent.target]] -= self.switch_penalty
+            choice = dict(hungarian(cost))
+
+            # Primero se liberan los objetivos que cambian de dueño y después se reservan los nuevos
+            changes = []
+            for row, agent in enumerate(group):
+                new = points[choice[row]] if row in choice else None
+                if new is agent.target:
+                    continue
+                if agent.target is not None:
+                    environment.release_waste(agent.target)
+                    self.switches += 1
+                    if new is None:
+                        agent.drop_target()
+                changes.append((agent, new))
+            # Reservar todo el lote antes de que cada recolector complete su recorrido
+            for agent, new in changes:
+                if new is not None:
+                    environment.reserve_waste(new)
+            for agent, new in changes:
+                if new is not None:
+                    agent.assign(new)
+                    assigned += 1
+        self.assigned += assigned
+        return assigned
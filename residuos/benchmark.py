@@ -0,0 +1,263 @@
+"""Banco de pruebas reproducible de rendimiento de la simulación.
+
+Ejecuta escenarios fijos sin pantalla y con semilla, mide ticks/s, tiempo
+de búsqueda de rutas y ticks hasta despejar el mapa, y compara contra una
+línea base JSON para detectar regresiones:
+
+    python -m residuos.benchmark --save baseline.json
+    python -m residuos.benchmark --baseline baseline.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from .arrivals import PoissonArrivals
+from .config import FPS, HEIGHT, WIDTH
+from .roadnet import RoadNetwork
+from .sharding import PATH_COUNTERS, ShardedSimulation, build_sharded_simulation, path_counters
+from .simulation import build_simulation
+
+# nombre -> parámetros del escenario; max_ticks acota los escenarios grandes
+SCENARIOS = {
+    'small': dict(num_points=20, num_collectors=3, capacity=4, max_ticks=20_000),
+    'small-cap20': dict(num_points=20, num_collectors=3, capacity=20, max_ticks=20_000),
+    'medium': dict(num_points=1_000, num_collectors=50, capacity=4, max_ticks=20_000),
+    'medium-cap50': dict(num_points=1_000, num_collectors=50, capacity=50, max_ticks=20_000),
+    'medium-trucks8': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000),
+    'large': dict(num_points=100_000, num_collectors=1_000, capacity=100, max_ticks=500),
+    'large-cap1000': dict(num_points=100_000, num_collectors=1_000, capacity=1_000, max_ticks=500),
+    # Cierres de calles: cada `closure_every` ticks se reabren los anteriores y se cierran otros
+    'medium-closures': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                            closure_every=50, closure_cells=10),
+    # Red viaria en cuadrícula con avenidas y tramos eliminados, de `road_nodes` nodos
+    'medium-roads': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                         road_nodes=10_000),
+    'large-roads': dict(num_points=100_000, num_collectors=1_000, capacity=100, max_ticks=500, road_nodes=100_000),
+    # Generación continua: `arrival_rate` residuos nuevos por tick (Poisson); se corta en max_ticks
+    'medium-stream': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                          arrival_rate=0.05),
+    # Reparto en lote (algoritmo húngaro por grupos) en lugar del más cercano por orden de lista
+    'small-batch': dict(num_points=20, num_collectors=3, capacity=4, max_ticks=20_000, assignment='batch'),
+    'medium-batch': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                         assignment='batch'),
+    'large-batch': dict(num_points=100_000, num_collectors=1_000, capacity=100, max_ticks=500, assignment='batch'),
+    # Flota de recolectores como cuello de botella (camiones holgados), donde más se nota el reparto
+    'medium-fleet': dict(num_points=1_000, num_collectors=100, capacity=1_000, num_trucks=8, max_ticks=20_000),
+    'medium-fleet-batch': dict(num_points=1_000, num_collectors=100, capacity=1_000, num_trucks=8, max_ticks=20_000,
+                               assignment='batch'),
+    # Recorridos de varios residuos por recolector antes de ir al camión
+    'medium-carry4': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                          carry_capacity=4),
+    'medium-fleet-carry4': dict(num_points=1_000, num_collectors=100, capacity=1_000, num_trucks=8, max_ticks=20_000,
+                                carry_capacity=4),
+    # Motor de eventos discretos: mismos resultados exactos que su escenario tick a tick
+    'small-event': dict(num_points=20, num_collectors=3, capacity=4, max_ticks=20_000, engine='event'),
+    'medium-trucks8-event': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                                 engine='event'),
+    'medium-stream-event': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                                arrival_rate=0.05, engine='event'),
+    # Una hora simulada (a 60 ticks/s) con pocos residuos nuevos, donde casi todo son ticks sin decisiones
+    'small-stream-hour': dict(num_points=20, num_collectors=3, capacity=4, max_ticks=216_000, arrival_rate=0.002),
+    'small-stream-hour-event': dict(num_points=20, num_collectors=3, capacity=4, max_ticks=216_000,
+                                    arrival_rate=0.002, engine='event'),
+    # Clasificación con ritmo y cola limitados: el cuello de botella pasa a los centros
+    'medium-trucks8-classify': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8, max_ticks=20_000,
+                                    service_rate=0.01, queue_capacity=4),
+    'medium-trucks8-classify-event': dict(num_points=1_000, num_collectors=50, capacity=4, num_trucks=8,
+                                          max_ticks=20_000, service_rate=0.01, queue_capacity=4, engine='event'),
+    # Centros que se llenan a mitad de ejecución: el mapa tiene que despejarse igualmente
+    'small-full-centers': dict(num_points=60, num_collectors=4, capacity=4, max_ticks=20_000, center_capacity=5),
+    # Ciudad muy grande y la misma repartida en franjas entre `shards` procesos (ver `residuos.sharding`)
+    'xlarge': dict(num_points=200_000, num_collectors=4_000, capacity=1_000, num_trucks=4, max_ticks=300),
+    'xlarge-sharded4': dict(num_points=200_000, num_collectors=4_000, capacity=1_000, num_trucks=4, max_ticks=300,
+                            shards=4),
+    # La flota de medium-fleet en 4 shards: con --baseline, traspasos y rechazos también deben repetirse exactos
+    'medium-fleet-sharded4': dict(num_points=1_000, num_collectors=100, capacity=1_000, num_trucks=8, max_ticks=20_000,
+                                  shards=4),
+}
+
+# Métricas deterministas (deben coincidir exactamente) y de tiempo (con tolerancia);
+# traspasos y rechazos solo existen en los escenarios repartidos
+EXACT_METRICS = ('ticks', 'collected', 'ticks_to_clear', 'path_queries', 'handoffs', 'rejections')
+TIMING_METRICS = ('ticks_per_sec',)
+
+
+def road_network(num_nodes, seed=0):
+    """Red de calles sintética de unos `num_nodes` nodos que ocupa el mapa, con landmarks ALT"""
+    spacing = ((WIDTH - 100) * (HEIGHT - 100) / num_nodes) ** 0.5
+    network = RoadNetwork.lattice(WIDTH - 100, HEIGHT - 100, spacing, drop=0.1, seed=seed).fit(WIDTH, HEIGHT)
+    network.preprocess(seed=seed)
+    return network
+
+
+def run_scenario(name, seed=0):
+    """Ejecutar un escenario y devolver sus métricas"""
+    params = dict(SCENARIOS[name])
+    max_ticks = params.pop('max_ticks')
+    closure_every = params.pop('closure_every', None)
+    closure_cells = params.pop('closure_cells', 0)
+    road_nodes = params.pop('road_nodes', None)
+    arrival_rate = params.pop('arrival_rate', None)
+    shards = params.pop('shards', None)
+
+    build_started = time.perf_counter()
+    if road_nodes:
+        params['road_network'] = road_network(road_nodes, seed)
+    if arrival_rate:
+        params['arrivals'] = PoissonArrivals(arrival_rate, seed=seed)
+    if shards:
+        simulation = build_sharded_simulation(seed=seed, shards=shards, **params)
+    else:
+        simulation = build_simulation(seed=seed, **params)
+    build_time = time.perf_counter() - build_started
+    try:
+        return measure(name, seed, simulation, build_time, max_ticks, arrival_rate, closure_every, closure_cells)
+    finally:
+        if shards:
+            simulation.close()
+
+
+def measure(name, seed, simulation, build_time, max_ticks, arrival_rate, closure_every, closure_cells):
+    """Avanzar una simulación ya construida hasta despejar el mapa (o max_ticks) y devolver sus métricas"""
+    grid = simulation.environment.grid
+    closure_rng = random.Random(seed)
+    closed = []
+    # Se avanza de una vez hasta el siguiente cierre (o el final) y se para al despejar el mapa
+    until = None if arrival_rate else type(simulation).is_clear
+    started = time.perf_counter()
+    while simulation.tick < max_ticks and (arrival_rate or not simulation.is_clear()):
+        span = max_ticks - simulation.tick
+        if closure_every:
+            if simulation.tick % closure_every == closure_every - 1:
+                simulation.set_blocked(closed, blocked=False)
+                closed = [(closure_rng.randrange(grid.cols), closure_rng.randrange(grid.rows))
+                          for _ in range(closure_cells)]
+                simulation.set_blocked(closed)
+                span = 1
+            else:
+                span = min(span, (closure_every - 1 - simulation.tick) % closure_every)
+        simulation.step(span, until=until)
+    elapsed = time.perf_counter() - started
+
+    environment = simulation.environment
+    sharded = isinstance(simulation, ShardedSimulation)
+    if sharded:
+        path = simulation.path_stats()
+        collector_distance = float(simulation.collector_column('travelled').sum())
+        collector_deliveries = int(simulation.collector_column('deliveries').sum())
+    else:
+        path = dict(zip(PATH_COUNTERS, path_counters(environment.pathfinder)))
+        collector_distance = sum(agent.distance_travelled for agent in simulation.collection_agents)
+        collector_deliveries = sum(agent.deliveries for agent in simulation.collection_agents)
+    scheduler = None if sharded else simulation.scheduler
+    ticks_to_clear = simulation.tick if simulation.is_clear() and not arrival_rate else None
+    result = {
+        'scenario': name,
+        'seed': seed,
+        'ticks': simulation.tick,
+        'collected': environment.collected_count,
+        'spawned': environment.spawned_count,
+        'waste_rows': environment.waste_store.size,
+        'ticks_to_clear': ticks_to_clear,
+        'seconds_to_clear': ticks_to_clear / FPS if ticks_to_clear is not None else None,
+        'build_time': build_time,
+        'wall_time': elapsed,
+        'ticks_per_sec': simulation.tick / elapsed if elapsed > 0 else float('inf'),
+        'path_queries': path['queries'],
+        'path_time': path['search_time'],
+        'path_cache_hits': path['cache_hits'],
+        'path_cache_misses': path['cache_misses'],
+        'path_repairs': path['repairs'],
+        'path_expansions': path['expansions'],
+        'collector_distance': collector_distance,
+        'collector_deliveries': collector_deliveries,
+        'mean_path_length': path['waypoints'] / path['queries'] if path['queries'] else 0.0,
+        'busy_ticks': scheduler.busy_ticks if scheduler is not None else simulation.tick,
+    }
+    # Rendimiento de la clasificación: residuos por tick, ocupación y cola de los centros
+    classifiers = environment.central_station.classification_metrics(simulation.tick)
+    classified = sum(entry['classified'] for entry in classifiers)
+    result.update(
+        classified=classified,
+        classification_throughput=classified / simulation.tick if simulation.tick else 0.0,
+        classifier_utilization=max(entry['utilization'] for entry in classifiers),
+        classifier_mean_queue=max(entry['mean_queue'] for entry in classifiers),
+        truck_blocked_ticks=sum(truck.blocked_ticks for truck in simulation.transport_agents),
+    )
+    if sharded:
+        # Con un núcleo por shard el tick dura lo que el coordinador más el shard más lento
+        parallel = simulation.coordinator_seconds + simulation.critical_seconds
+        result.update(
+            shards=simulation.layout.shards,
+            handoffs=simulation.handoffs,
+            rejections=simulation.rejections,
+            shard_seconds=simulation.shard_seconds,
+            parallel_estimate=parallel,
+            parallel_ticks_per_sec=simulation.tick / parallel if parallel > 0 else float('inf'),
+        )
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Diferencias frente a la línea base; devuelve la lista de regresiones"""
+    regressions = []
+    previous = {entry['scenario']: entry for entry in baseline['results']}
+    for result in results:
+        old = previous.get(result['scenario'])
+        if old is None or old.get('seed') != result['seed']:
+            continue
+        for metric in EXACT_METRICS:
+            if metric in old and old[metric] != result.get(metric):
+                regressions.append(f"{result['scenario']}: {metric} {old[metric]} -> {result.get(metric)}")
+        for metric in TIMING_METRICS:
+            if old.get(metric) and result[metric] < old[metric] * (1 - tolerance):
+                change = (result[metric] / old[metric] - 1) * 100
+                regressions.append(f"{result['scenario']}: {metric} {old[metric]:.1f} -> {result[metric]:.1f} ({change:+.1f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='escenario a ejecutar (repetible; por defecto todos)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='FILE', help='guardar los resultados como línea base JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='comparar con una línea base JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='caída relativa de ticks/s admitida antes de marcar regresión')
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, seed=args.seed)
+        results.append(result)
+        clear = result['ticks_to_clear'] if result['ticks_to_clear'] is not None else '-'
+        print(f"{name:>14}: {result['ticks_per_sec']:10.1f} ticks/s  "
+              f"A* {result['path_time']:7.3f}s ({result['path_queries']} consultas)  "
+              f"despejado en {clear} ticks  recogidos {result['collected']}")
+        if SCENARIOS[name].get('service_rate'):
+            print(f"{'':>14}  clasificados {result['classified']} ({result['classification_throughput']:.4f}/tick)  "
+                  f"ocupación máx. {result['classifier_utilization']:.0%}  cola media máx. "
+                  f"{result['classifier_mean_queue']:.2f}  camiones bloqueados {result['truck_blocked_ticks']} ticks")
+        if 'shards' in result:
+            print(f"{'':>14}  {result['parallel_ticks_per_sec']:10.1f} ticks/s estimados con un núcleo por shard  "
+                  f"({result['handoffs']} traspasos, {result['rejections']} entregas rechazadas)")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
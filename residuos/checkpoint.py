@@ -0,0 +1,399 @@
+"""Puntos de control: guardar y restaurar el estado completo de una simulación.
+
+El fichero es binario y versionado: una cabecera fija (firma, versión y
+longitud), una cabecera JSON con los escalares y el índice de arrays, y a
+continuación los arrays NumPy alineados a 64 bytes. Al restaurar, los
+arrays se proyectan en memoria con copia en escritura y pasan tal cual a
+las columnas de los almacenes, así que arrancar miles de ramas desde el
+mismo punto de control no vuelve a leer ni a copiar el fichero:
+
+    save_checkpoint(simulation, 'mediodia.ckpt')
+    rama = load_checkpoint('mediodia.ckpt')
+    rama.step(10_000)
+
+Las cachés de rutas (campos de distancias, A* y D* Lite) no se guardan: se
+reconstruyen bajo demanda con el mismo mapa.
+"""
+import json
+import mmap
+import struct
+from collections import deque
+
+import numpy as np
+
+from .agents import CollectionAgent, TransportAgent
+from .arrivals import PoissonArrivals, TraceArrivals
+from .assignment import BatchAssigner
+from .config import HEIGHT, WIDTH
+from .model import CityEnvironment, WastePoint
+from .scheduler import EventScheduler
+from .simulation import Simulation
+from .spatial import WasteIndex
+from .store import WASTE_TYPE_CODES, WASTE_TYPES
+
+MAGIC = b'RESIDCKP'
+FORMAT_VERSION = 2
+PREFIX = struct.Struct('<8sII')  # Firma, versión del formato y longitud de la cabecera JSON
+ALIGNMENT = 64
+
+COLLECTOR, TRUCK = 0, 1  # Tipo de agente en la columna `agents.kind`
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_checkpoint(path, meta, arrays):
+    """Escribir escalares (JSON) y arrays en el formato binario de punto de control"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        entries[name] = [array.dtype.str, list(array.shape), offset]
+        offset = align(offset + array.nbytes)
+    header = json.dumps({'meta': meta, 'arrays': entries}, ensure_ascii=False).encode('utf-8')
+    base = align(PREFIX.size + len(header))
+    with open(path, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(base + entries[name][2])
+            f.write(array.tobytes())
+        f.truncate(base + offset)  # Longitud completa, aunque los últimos arrays estén vacíos
+
+
+def read_checkpoint(path, memory_map=True):
+    """Leer un punto de control; devuelve (escalares, arrays).
+
+    Con `memory_map` los arrays son vistas con copia en escritura sobre el
+    fichero proyectado: se pueden modificar sin tocar el fichero.
+    """
+    with open(path, 'rb') as f:
+        magic, version, header_len = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} no es un punto de control de la simulación")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versión de punto de control no soportada: {version} (se esperaba {FORMAT_VERSION})")
+        header = json.loads(f.read(header_len).decode('utf-8'))
+        if memory_map:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            f.seek(0)
+            buffer = bytearray(f.read())
+    base = align(PREFIX.size + header_len)
+    arrays = {}
+    for name, (dtype, shape, offset) in header['arrays'].items():
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays[name] = np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=base + offset).reshape(shape)
+    return header['meta'], arrays
+
+
+def rng_state(rng):
+    """Estado de un random.Random como (array, gauss_next)"""
+    version, internal, gauss_next = rng.getstate()
+    return np.array(internal, dtype=np.uint32), gauss_next
+
+
+def set_rng_state(rng, internal, gauss_next):
+    rng.setstate((3, tuple(int(value) for value in internal), gauss_next))
+
+
+def pack_waste(lists, prefix, arrays):
+    """Guardar listas de residuos recolectados como columnas planas con punteros de inicio (CSR)"""
+    flat = [waste for waste_list in lists for waste in waste_list]
+    arrays[prefix + 'indptr'] = np.cumsum([0] + [len(waste_list) for waste_list in lists], dtype=np.int64)
+    arrays[prefix + 'x'] = np.array([waste.x for waste in flat], dtype=np.int32)
+    arrays[prefix + 'y'] = np.array([waste.y for waste in flat], dtype=np.int32)
+    arrays[prefix + 'type_code'] = np.array([WASTE_TYPE_CODES[waste.waste_type] for waste in flat], dtype=np.uint8)
+    arrays[prefix + 'weight'] = np.array([waste.weight for waste in flat], dtype=np.float32)
+
+
+def unpack_waste(store, prefix, arrays):
+    """Listas de vistas de residuos recolectados guardadas con `pack_waste`"""
+    indptr = arrays[prefix + 'indptr'].tolist()
+    x = arrays[prefix + 'x'].tolist()
+    y = arrays[prefix + 'y'].tolist()
+    codes = arrays[prefix + 'type_code'].tolist()
+    weight = arrays[prefix + 'weight'].tolist()
+    flat = [WastePoint.detached(store, x[i], y[i], WASTE_TYPES[codes[i]], weight[i]) for i in range(len(x))]
+    return [flat[start:end] for start, end in zip(indptr, indptr[1:])]
+
+
+def pack_columns(store, prefix, arrays):
+    for name in store.columns:
+        arrays[prefix + name] = getattr(store, name)[:store.size]
+    arrays[prefix + 'free_slots'] = np.array(store.free_slots, dtype=np.int64)
+
+
+def unpack_columns(store, prefix, arrays):
+    """Sustituir las columnas de un almacén por las del punto de control (sin copiarlas)"""
+    size = len(arrays[prefix + next(iter(store.columns))])
+    if size:
+        for name in store.columns:
+            setattr(store, name, arrays[prefix + name])
+    store.size = size
+    store.free_slots = arrays[prefix + 'free_slots'].tolist()
+
+
+def save_checkpoint(simulation, path):
+    """Guardar en `path` el estado completo de una simulación entre dos ticks"""
+    environment = simulation.environment
+    pathfinder = environment.pathfinder
+    agents = sorted(simulation.collection_agents + simulation.transport_agents, key=lambda agent: agent.slot)
+    trucks = {truck: i for i, truck in enumerate(simulation.transport_agents)}
+    centers = {center: i for i, center in enumerate(environment.centers)}
+    arrays = {}
+
+    # Entorno: generador, residuos vivos (en orden), índice espacial y cierres
+    rng_internal, rng_gauss = rng_state(environment.rng)
+    arrays['environment.rng'] = rng_internal
+    pack_columns(environment.waste_store, 'waste.', arrays)
+    arrays['waste.live'] = np.array([point.index for point in environment.waste_points], dtype=np.int64)
+    arrays['waste.available'] = np.array(
+        [point.index for bucket in environment.waste_index.buckets.values() for point in bucket], dtype=np.int64)
+    grid = environment.grid
+    arrays['grid.blocked'] = np.array(sorted(grid.blocked) if grid is not None else [], dtype=np.int32).reshape(-1, 2)
+
+    # Agentes móviles: columnas del almacén (rutas incluidas) y máquina de estados
+    store = environment.agent_store
+    pack_columns(store, 'agent.', arrays)
+    # Las matrices de waypoints se guardan con el ancho justo; `set_path` lo amplía si hace falta
+    width = max(1, int(store.path_len[:store.size].max(initial=0)))
+    for name in store.path_columns:
+        arrays['agent.' + name] = getattr(store, name)[:store.size, :width]
+    states = sorted({agent.state for agent in agents} | {state for agent in agents for state in agent.state_ticks})
+    state_codes = {state: code for code, state in enumerate(states)}
+    state_ticks = np.full((len(agents), len(states)), -1, dtype=np.int64)
+    for i, agent in enumerate(agents):
+        for state, ticks in agent.state_ticks.items():
+            state_ticks[i, state_codes[state]] = ticks
+    arrays['agents.kind'] = np.array([TRUCK if agent in trucks else COLLECTOR for agent in agents], dtype=np.uint8)
+    arrays['agents.state'] = np.array([state_codes[agent.state] for agent in agents], dtype=np.uint8)
+    arrays['agents.state_ticks'] = state_ticks
+    arrays['agents.state_since'] = np.array([agent.state_since for agent in agents], dtype=np.int64)
+    arrays['agents.goal'] = np.array([agent.goal if agent.goal is not None else (np.nan, np.nan) for agent in agents],
+                                     dtype=np.float64).reshape(-1, 2)
+    arrays['agents.stalled'] = np.array([agent.stalled for agent in agents], dtype=np.bool_)
+    collectors = simulation.collection_agents
+    arrays['collectors.target'] = np.array(
+        [agent.target.index if agent.target is not None else -1 for agent in collectors], dtype=np.int64)
+    arrays['collectors.truck'] = np.array(
+        [trucks[agent.truck] if agent.truck is not None else -1 for agent in collectors], dtype=np.int32)
+    arrays['collectors.carry_capacity'] = np.array([agent.carry_capacity for agent in collectors], dtype=np.int32)
+    arrays['collectors.deliveries'] = np.array([agent.deliveries for agent in collectors], dtype=np.int64)
+    arrays['collectors.tour_indptr'] = np.cumsum([0] + [len(agent.tour) for agent in collectors], dtype=np.int64)
+    arrays['collectors.tour'] = np.array([point.index for agent in collectors for point in agent.tour], dtype=np.int64)
+    pack_waste([agent.collected_waste for agent in collectors], 'collectors.cargo.', arrays)
+    pack_waste([truck.collected_waste for truck in simulation.transport_agents], 'trucks.cargo.', arrays)
+    pack_waste([agent.received_waste for agent in environment.classification_agents], 'classifiers.inbox.', arrays)
+
+    # Llegadas: el proceso de Poisson se guarda entero; de una traza, solo el cursor
+    arrivals = simulation.arrivals
+    arrivals_meta = None
+    if isinstance(arrivals, PoissonArrivals):
+        # Con el motor de eventos puede haber ticks ya sorteados por adelantado
+        arrivals_meta = {'kind': 'poisson', 'rate': arrivals.rate, 'horizon': arrivals.horizon,
+                         'due': list(arrivals.due) if arrivals.due is not None else None}
+        arrays['arrivals.rng'], arrivals_meta['gauss'] = rng_state(arrivals.rng)
+    elif isinstance(arrivals, TraceArrivals):
+        arrivals_meta = {'kind': 'trace', 'position': arrivals.position, 'events': len(arrivals.events)}
+    elif arrivals is not None:
+        raise ValueError(f"No se sabe guardar la fuente de llegadas {type(arrivals).__name__}")
+
+    network = environment.road_network
+    meta = {
+        'tick': simulation.tick,
+        'num_points': environment.num_points,
+        'grid_size': environment.grid_size,
+        'grid_version': grid.version if grid is not None else 0,
+        'road_network': [len(network), len(network.indices)] if network is not None else None,
+        'rng_gauss': rng_gauss,
+        'spawned_count': environment.spawned_count,
+        'collected_count': environment.collected_count,
+        'index_cell_size': environment.waste_index.cell_size,
+        'path_queries': pathfinder.queries,
+        'path_repairs': pathfinder.repairs,
+        'path_expansions': pathfinder.expansions,
+        'path_waypoints': pathfinder.waypoints,
+        'centers': [[center.received_count, center.received_weight, center.capacity]
+                    for center in environment.centers],
+        'states': states,
+        'names': [agent.name for agent in agents],
+        'trucks': [{
+            'capacity': truck.capacity,
+            'home': [float(truck.home[0]), float(truck.home[1])],
+            'current_load': truck.current_load,
+            'reserved_load': truck.reserved_load,
+            'departure_requested': truck.departure_requested,
+            'target_centers': [centers[center] for center in truck.target_centers],
+            'current_center_index': truck.current_center_index,
+            'trips': truck.trips,
+            'items_received': truck.items_received,
+            'items_loaded_on_trips': truck.items_loaded_on_trips,
+            'blocked_ticks': truck.blocked_ticks,
+        } for truck in simulation.transport_agents],
+        'classifiers': [{
+            'service_rate': agent.service_rate,
+            'queue_capacity': agent.queue_capacity,
+            'credit': agent.credit,
+            'classified': agent.classified,
+            'discarded': agent.discarded,
+            'busy_ticks': agent.busy_ticks,
+            'queue_ticks': agent.queue_ticks,
+            'max_queue': agent.max_queue,
+        } for agent in environment.classification_agents],
+        'arrivals': arrivals_meta,
+        'assigner': {
+            'exact_limit': simulation.assigner.exact_limit,
+            'candidates': simulation.assigner.candidates,
+            'neighbours': simulation.assigner.neighbours,
+            'switch_penalty': simulation.assigner.switch_penalty,
+        } if simulation.assigner is not None else None,
+        'engine': 'event' if simulation.scheduler is not None else 'tick',
+    }
+    write_checkpoint(path, meta, arrays)
+
+
+def load_checkpoint(path, road_network=None, arrivals=None, log=None, memory_map=True):
+    """Restaurar una simulación guardada con `save_checkpoint`.
+
+    La red viaria no se guarda en el punto de control: si la simulación la
+    usaba hay que pasar la misma. Un proceso de Poisson se reconstruye solo;
+    una traza hay que pasarla en `arrivals` y se reanuda donde iba.
+    """
+    meta, arrays = read_checkpoint(path, memory_map=memory_map)
+    saved_network = meta['road_network']
+    if saved_network is not None and road_network is None:
+        raise ValueError("El punto de control usa una red viaria: hay que pasarla en `road_network`")
+    if saved_network is not None and saved_network != [len(road_network), len(road_network.indices)]:
+        raise ValueError("La red viaria no coincide con la del punto de control")
+
+    environment = CityEnvironment(num_points=0, log=log, grid_size=meta['grid_size'], road_network=road_network)
+    environment.num_points = meta['num_points']
+    environment.tick = meta['tick']
+    environment.log.tick = meta['tick']
+    set_rng_state(environment.rng, arrays['environment.rng'], meta['rng_gauss'])
+    environment.spawned_count = meta['spawned_count']
+    environment.collected_count = meta['collected_count']
+    environment.pathfinder.queries = meta['path_queries']
+    environment.pathfinder.repairs = meta['path_repairs']
+    environment.pathfinder.expansions = meta.get('path_expansions', 0)
+    environment.pathfinder.waypoints = meta.get('path_waypoints', 0)
+    grid = environment.grid
+    if grid is not None:
+        # Como un único cambio desde la versión 0: los campos ya creados para los centros se corrigen solos
+        blocked = grid.set_blocked(tuple(cell) for cell in arrays['grid.blocked'].tolist())
+        grid.version = meta['grid_version']
+        grid.changes = [(grid.version, frozenset(blocked))] if blocked else []
+
+    # Residuos: columnas, conjunto vivo en su orden e índice con el orden de sus cubetas
+    waste_store = environment.waste_store
+    unpack_columns(waste_store, 'waste.', arrays)
+    points = {index: WastePoint(waste_store, index) for index in arrays['waste.live'].tolist()}
+    environment.waste_points = dict.fromkeys(points.values())
+    environment.waste_index = WasteIndex(WIDTH, HEIGHT, cell_size=meta['index_cell_size'])
+    for index in arrays['waste.available'].tolist():
+        environment.waste_index.add(points[index])
+
+    for center, (count, weight, capacity) in zip(environment.centers, meta['centers']):
+        center.received_count = count
+        center.received_weight = weight
+        center.capacity = capacity
+
+    # Agentes en el orden de sus filas del almacén, que después se sustituye entero
+    agent_store = environment.agent_store
+    x = arrays['agent.x'].tolist()
+    y = arrays['agent.y'].tolist()
+    speed = arrays['agent.speed'].tolist()
+    truck_meta = iter(meta['trucks'])
+    agents = []
+    collection_agents = []
+    transport_agents = []
+    for slot, kind in enumerate(arrays['agents.kind'].tolist()):
+        name = meta['names'][slot]
+        if kind == TRUCK:
+            saved = next(truck_meta)
+            agent = TransportAgent(x=saved['home'][0], y=saved['home'][1], environment=environment,
+                                   capacity=saved['capacity'], name=name, speed=speed[slot])
+            transport_agents.append(agent)
+        else:
+            agent = CollectionAgent(x=x[slot], y=y[slot], environment=environment, name=name, speed=speed[slot])
+            collection_agents.append(agent)
+        agents.append(agent)
+
+    unpack_columns(agent_store, 'agent.', arrays)
+
+    states = meta['states']
+    state_ticks = arrays['agents.state_ticks'].tolist()
+    state_since = arrays['agents.state_since'].tolist()
+    goals = arrays['agents.goal'].tolist()
+    stalled = arrays['agents.stalled'].tolist()
+    for slot, (agent, code) in enumerate(zip(agents, arrays['agents.state'].tolist())):
+        agent._state = states[code]
+        agent.state_ticks = {states[i]: ticks for i, ticks in enumerate(state_ticks[slot]) if ticks >= 0}
+        agent.state_since = state_since[slot]
+        agent.goal = None if goals[slot][0] != goals[slot][0] else tuple(goals[slot])
+        agent.stalled = stalled[slot]
+        if agent.stalled:
+            environment.stalled_agents.add(agent)
+
+    targets = arrays['collectors.target'].tolist()
+    assigned = arrays['collectors.truck'].tolist()
+    cargo = unpack_waste(waste_store, 'collectors.cargo.', arrays)
+    tour_indptr = arrays['collectors.tour_indptr'].tolist()
+    tours = [points[index] for index in arrays['collectors.tour'].tolist()]
+    carry = arrays['collectors.carry_capacity'].tolist()
+    deliveries = arrays['collectors.deliveries'].tolist()
+    for i, (agent, target, truck, waste) in enumerate(zip(collection_agents, targets, assigned, cargo)):
+        agent.target = points[target] if target >= 0 else None
+        agent.truck = transport_agents[truck] if truck >= 0 else None
+        agent.collected_waste = waste
+        agent.tour = tours[tour_indptr[i]:tour_indptr[i + 1]]
+        agent.carry_capacity = carry[i]
+        agent.deliveries = deliveries[i]
+
+    cargo = unpack_waste(waste_store, 'trucks.cargo.', arrays)
+    for truck, saved, waste in zip(transport_agents, meta['trucks'], cargo):
+        truck.collected_waste = waste
+        truck.current_load = saved['current_load']
+        truck.reserved_load = saved['reserved_load']
+        truck.departure_requested = saved.get('departure_requested', False)
+        truck.target_centers = [environment.centers[i] for i in saved['target_centers']]
+        truck.current_center_index = saved['current_center_index']
+        truck.trips = saved['trips']
+        truck.items_received = saved['items_received']
+        truck.items_loaded_on_trips = saved['items_loaded_on_trips']
+        truck.blocked_ticks = saved.get('blocked_ticks', 0)
+
+    inboxes = unpack_waste(waste_store, 'classifiers.inbox.', arrays)
+    classifiers = meta.get('classifiers') or [{}] * len(inboxes)
+    for agent, waste, saved in zip(environment.classification_agents, inboxes, classifiers):
+        agent.received_waste = deque(waste)
+        agent.service_rate = saved.get('service_rate')
+        agent.queue_capacity = saved.get('queue_capacity')
+        agent.credit = saved.get('credit', 0.0)
+        agent.classified = saved.get('classified', 0)
+        agent.discarded = saved.get('discarded', 0)
+        agent.busy_ticks = saved.get('busy_ticks', 0)
+        agent.queue_ticks = saved.get('queue_ticks', 0)
+        agent.max_queue = saved.get('max_queue', 0)
+
+    saved_arrivals = meta['arrivals']
+    if saved_arrivals is not None:
+        if saved_arrivals['kind'] == 'poisson':
+            if arrivals is None:
+                arrivals = PoissonArrivals(saved_arrivals['rate'])
+            set_rng_state(arrivals.rng, arrays['arrivals.rng'], saved_arrivals['gauss'])
+            arrivals.horizon = saved_arrivals['horizon']
+            arrivals.due = tuple(saved_arrivals['due']) if saved_arrivals['due'] is not None else None
+        else:
+            if arrivals is None:
+                raise ValueError("El punto de control usa una traza de llegadas: hay que pasarla en `arrivals`")
+            arrivals.position = saved_arrivals['position']
+
+    assigner = BatchAssigner(**meta['assigner']) if meta.get('assigner') else None
+    simulation = Simulation(environment, collection_agents, transport_agents, arrivals=arrivals, assigner=assigner)
+    simulation.tick = meta['tick']
+    if meta['engine'] == 'event':
+        simulation.scheduler = EventScheduler()
+    return simulation
@@ -0,0 +1,134 @@
+"""Punto de entrada de línea de comandos.
+
+Sin `--headless` se importa el renderizador (y con él pygame) solo al
+abrir la ventana; sin pantalla la simulación arranca sin SDL.
+"""
+import argparse
+import sys
+
+from .arrivals import PoissonArrivals, TraceArrivals
+from .checkpoint import load_checkpoint, save_checkpoint
+from .config import HEIGHT, WIDTH
+from .eventlog import LEVELS, EventLog
+from .profiling import Profiler
+from .roadnet import RoadNetwork
+from .scheduler import EventScheduler
+from .sharding import build_sharded_simulation
+from .simulation import ASSIGNMENTS, ENGINES, build_simulation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sistema Multiagente de Gestión de Residuos Urbanos")
+    parser.add_argument("--headless", action="store_true", help="simular sin ventana")
+    parser.add_argument("--ticks", type=int, default=None, help="número máximo de ticks a simular")
+    parser.add_argument("--render-every", type=int, default=1, help="dibujar cada k ticks")
+    parser.add_argument("--seed", type=int, default=None, help="semilla para una ejecución reproducible")
+    parser.add_argument("--trucks", type=int, default=1, help="número de camiones de la flota")
+    parser.add_argument("--log-level", choices=[*LEVELS, "OFF"], default=None,
+                        help="nivel del registro de eventos (por defecto DEBUG con ventana y OFF sin ella)")
+    parser.add_argument("--log-file", default=None, help="fichero JSONL donde volcar los eventos")
+    parser.add_argument("--road-network", default=None,
+                        help="red viaria .npz (x, y, source, target[, weight]) en lugar de la cuadrícula")
+    parser.add_argument("--arrival-rate", type=float, default=None,
+                        help="residuos nuevos por tick (proceso de Poisson) durante la simulación")
+    parser.add_argument("--arrival-trace", default=None,
+                        help="CSV (tick, x, y, waste_type[, weight]) con los residuos que van apareciendo")
+    parser.add_argument("--assignment", choices=ASSIGNMENTS, default='greedy',
+                        help="reparto de residuos: cada recolector el más cercano o en lote para todos los libres")
+    parser.add_argument("--carry", type=int, default=1,
+                        help="residuos que recoge cada recolector en un recorrido antes de ir al camión")
+    parser.add_argument("--service-rate", type=float, default=None,
+                        help="residuos que clasifica cada centro por tick (por defecto todo lo recibido)")
+    parser.add_argument("--queue-capacity", type=int, default=None,
+                        help="tamaño de la cola de clasificación de cada centro (por defecto sin límite)")
+    parser.add_argument("--center-capacity", type=int, default=None,
+                        help="residuos que admite cada centro de tratamiento (por defecto 10000)")
+    parser.add_argument("--engine", choices=ENGINES, default=None,
+                        help="avance tick a tick o por eventos, saltando los ticks sin decisiones (por defecto tick)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="repartir el mapa en N franjas, cada una en su proceso (solo con --headless)")
+    parser.add_argument("--waste-capacity", type=int, default=None,
+                        help="filas iniciales de la memoria compartida de residuos con --shards (crece si se llena)")
+    parser.add_argument("--restore", default=None, help="reanudar desde un punto de control")
+    parser.add_argument("--checkpoint", default=None, help="guardar un punto de control al terminar")
+    parser.add_argument("--profile", action="store_true",
+                        help="medir cada fase del tick y mostrar el resumen al terminar")
+    parser.add_argument("--profile-file", default=None, help="CSV donde volcar las mediciones de cada tick")
+    args = parser.parse_args(argv)
+    if args.engine == 'event' and (args.profile or args.profile_file):
+        parser.error("el perfilador mide el avance tick a tick: no se puede combinar con --engine event")
+    if args.waste_capacity is not None and args.shards is None:
+        parser.error("--waste-capacity solo se admite con --shards")
+    if args.shards is not None:
+        if not args.headless:
+            parser.error("--shards solo se admite con --headless")
+        if (args.road_network or args.restore or args.checkpoint or args.profile or args.profile_file
+                or args.engine == 'event' or args.assignment != 'greedy'):
+            parser.error("--shards no se puede combinar con red viaria, puntos de control, perfilador, "
+                         "motor de eventos ni reparto en lote")
+
+    log_level = args.log_level or ("OFF" if args.headless else "DEBUG")
+    log = EventLog(level=LEVELS.get(log_level), path=args.log_file, console=not args.headless)
+    road_network = None
+    if args.road_network:
+        road_network = RoadNetwork.load(args.road_network).main_component().fit(WIDTH, HEIGHT)
+        if not road_network.landmarks:
+            road_network.preprocess()
+    arrivals = None
+    if args.arrival_trace:
+        arrivals = TraceArrivals.load_csv(args.arrival_trace)
+    elif args.arrival_rate is not None:
+        arrivals = PoissonArrivals(args.arrival_rate, seed=args.seed)
+    if args.shards is not None:
+        with build_sharded_simulation(num_trucks=args.trucks, seed=args.seed, log=log, arrivals=arrivals,
+                                      carry_capacity=args.carry, shards=args.shards,
+                                      waste_capacity=args.waste_capacity,
+                                      service_rate=args.service_rate, queue_capacity=args.queue_capacity,
+                                      center_capacity=args.center_capacity) as simulation:
+            simulation.step(args.ticks if args.ticks is not None else 10_000)
+        log.close()
+        return
+    if args.restore:
+        simulation = load_checkpoint(args.restore, road_network=road_network, arrivals=arrivals, log=log)
+        if args.engine is not None:
+            simulation.scheduler = EventScheduler() if args.engine == 'event' else None
+    else:
+        simulation = build_simulation(num_trucks=args.trucks, seed=args.seed, log=log, road_network=road_network,
+                                      arrivals=arrivals, assignment=args.assignment, carry_capacity=args.carry,
+                                      engine=args.engine or 'tick', service_rate=args.service_rate,
+                                      queue_capacity=args.queue_capacity, center_capacity=args.center_capacity)
+    if args.profile or args.profile_file:
+        simulation.scheduler = None
+        simulation.profiler = Profiler(path=args.profile_file)
+    if args.headless:
+        simulation.step(args.ticks if args.ticks is not None else 10_000)
+        finish(simulation, args, log)
+        return
+
+    from .render import PygameRenderer
+
+    renderer = PygameRenderer()
+    simulation.add_observer(renderer, every=args.render_every)
+    while renderer.running:
+        if args.ticks is not None and simulation.tick >= args.ticks:
+            break
+        simulation.step(args.render_every)
+
+    finish(simulation, args, log)
+    renderer.close()
+    sys.exit()
+
+
+def finish(simulation, args, log):
+    """Guardar el punto de control y el perfil pedidos y cerrar el registro"""
+    if args.checkpoint:
+        save_checkpoint(simulation, args.checkpoint)
+    if simulation.profiler is not None:
+        simulation.profiler.close()
+        if args.profile:
+            print(simulation.profiler.report())
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
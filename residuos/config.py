@@ -0,0 +1,18 @@
+"""Dimensiones del mapa, colores y frecuencia de la simulación."""
+
+# Dimensiones de la ventana
+WIDTH, HEIGHT = 800, 600
+
+# Colores
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (0, 200, 0)
+BLUE = (0, 100, 255)
+RED = (200, 0, 0)
+YELLOW = (255, 255, 0)
+BROWN = (139, 69, 19)
+ORANGE = (255, 165, 0)
+GRAY = (128, 128, 128)
+
+# FPS
+FPS = 60
@@ -0,0 +1,76 @@
+"""Registro de eventos estructurado, con niveles y escritura por lotes."""
+import json
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+class EventLog:
+    """Sumidero de eventos con niveles, búfer circular en memoria y volcado por lotes a JSONL.
+
+    Cada evento es una tupla (tick, nivel, tipo, campos). El mensaje legible
+    solo se formatea si hay salida por consola. Con `level=None` el registro
+    queda desactivado y `enabled` es False, de modo que los llamadores pueden
+    saltarse incluso la construcción de los campos.
+    """
+    def __init__(self, level=INFO, buffer_size=10_000, path=None, batch_size=1_000, console=False):
+        self.level = level
+        self.enabled = level is not None
+        self.buffer = deque(maxlen=buffer_size)
+        self.console = console
+        self.batch_size = batch_size
+        self.pending = []
+        self.file = open(path, 'a', encoding='utf-8') if path and self.enabled else None
+        self.tick = 0  # Lo actualiza la simulación en cada tick
+
+    @classmethod
+    def disabled(cls):
+        return cls(level=None, buffer_size=0)
+
+    def emit(self, level, kind, message, **fields):
+        """Registrar un evento; `message` es una plantilla de str.format con los campos"""
+        if not self.enabled or level < self.level:
+            return
+        event = (self.tick, level, kind, fields)
+        self.buffer.append(event)
+        if self.console:
+            print(message.format(**fields))
+        if self.file is not None:
+            self.pending.append(event)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def debug(self, kind, message, **fields):
+        self.emit(DEBUG, kind, message, **fields)
+
+    def info(self, kind, message, **fields):
+        self.emit(INFO, kind, message, **fields)
+
+    def warning(self, kind, message, **fields):
+        self.emit(WARNING, kind, message, **fields)
+
+    def events(self, kind=None):
+        """Eventos retenidos en el búfer circular, opcionalmente filtrados por tipo"""
+        return [event for event in self.buffer if kind is None or event[2] == kind]
+
+    def flush(self):
+        """Escribir en el fichero los eventos pendientes en una sola operación"""
+        if self.file is None or not self.pending:
+            return
+        lines = []
+        for tick, level, kind, fields in self.pending:
+            record = {'tick': tick, 'level': LEVEL_NAMES[level], 'kind': kind}
+            record.update(fields)
+            lines.append(json.dumps(record, ensure_ascii=False))
+        self.file.write('\n'.join(lines) + '\n')
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,326 @@
+"""Modelo del entorno urbano: residuos, centros de tratamiento y estación central."""
+import math
+import random
+
+from .agents import ClassificationAgent
+from .config import BLACK, BLUE, GREEN, HEIGHT, WIDTH, YELLOW
+from .eventlog import EventLog
+from .pathfinding import Grid, Pathfinder
+from .roadnet import RoadPathfinder
+from .spatial import WasteIndex
+from .store import WASTE_TYPES, AgentStore, WasteStore
+
+
+# Definición del Entorno Urbano
+class CityEnvironment:
+    def __init__(self, num_points, seed=None, log=None, grid_size=20, road_network=None, service_rate=None,
+                 queue_capacity=None, center_capacity=None):
+        self.num_points = num_points
+        self.tick = 0  # Tick actual, lo actualiza la simulación
+        self.log = log if log is not None else EventLog.disabled()  # Registro de eventos compartido
+        self.rng = random.Random(seed)  # Generador propio para ejecuciones reproducibles
+        self.spawned_count = 0
+        self.collected_count = 0
+        # Se incrementa con cada cambio que puede despertar a un agente que sondea
+        # (residuos libres, cambios de estado); lo usa el motor de eventos
+        self.revision = 0
+        # Pares (residuo, recolectado) desde el último fotograma, si un renderizador los sigue
+        self.waste_changes = None
+        # Columnas contiguas con los datos de residuos y posiciones de agentes
+        self.waste_store = WasteStore(capacity=num_points)
+        self.agent_store = AgentStore()
+        # Búsqueda de rutas: cuadrícula uniforme o, si se da, red viaria ponderada
+        self.grid_size = grid_size  # Tamaño de la cuadrícula para el algoritmo A*
+        self.road_network = road_network
+        if road_network is None:
+            self.grid = Grid(WIDTH, HEIGHT, self.grid_size)
+            self.pathfinder = Pathfinder(self.grid)
+        else:
+            self.grid = None
+            self.pathfinder = RoadPathfinder(road_network)
+        self.stalled_agents = set()  # Agentes sin camino a su destino, a la espera de que se reabra
+        # Índice espacial de los residuos disponibles (ni recolectados ni reservados)
+        self.waste_index = WasteIndex(WIDTH, HEIGHT, cell_size=self.index_cell_size(num_points))
+        # Residuos vivos en el mapa (disponibles o reservados), como conjunto ordenado;
+        # al recolectarlos salen de aquí y su fila del almacén se reutiliza
+        self.waste_points = {}
+        self.generate_waste_points(num_points)
+        self.centers = self.generate_centers()
+        if center_capacity is not None:
+            for center in self.centers:
+                center.capacity = center_capacity
+        # Campos de distancias hacia los destinos fijos (cada camión añade su base)
+        for center in self.centers:
+            self.pathfinder.add_destination((center.x, center.y))
+        
+        # Create classification agents associated with each center
+        # (cola acotada a `queue_capacity` atendida a `service_rate` residuos por tick)
+        self.classification_agents = [
+            ClassificationAgent(name="ClassificationAgent_Orgánico", log=self.log, x=90, y=100, associated_center=self.centers[0], color=BLACK,
+                                service_rate=service_rate, queue_capacity=queue_capacity),
+            ClassificationAgent(name="ClassificationAgent_Inorgánico", log=self.log, x=390, y=100, associated_center=self.centers[1], color=BLACK,
+                                service_rate=service_rate, queue_capacity=queue_capacity),
+            ClassificationAgent(name="ClassificationAgent_Otro", log=self.log, x=690, y=100, associated_center=self.centers[2], color=BLACK,
+                                service_rate=service_rate, queue_capacity=queue_capacity)
+        ]
+        
+        # Pass classification agents to CentralStation
+        self.central_station = CentralStation(classification_agents=self.classification_agents, log=self.log)
+
+    def generate_waste_points(self, num_points):
+        return [self.add_waste(*self.random_waste()) for _ in range(num_points)]
+
+    def random_waste(self, rng=None):
+        """Posición, tipo y peso de un residuo al azar: (x, y, tipo, peso)"""
+        rng = rng or self.rng
+        if self.road_network is None:
+            x = rng.randint(50, WIDTH - 50)
+            y = rng.randint(50, HEIGHT - 50)
+        else:
+            # En una red viaria los residuos aparecen en los nodos (direcciones de calle)
+            x, y = self.road_network.position(rng.randrange(len(self.road_network)))
+        waste_type = rng.choice(WASTE_TYPES)
+        weight = 1  # random.randint(1, 1)  # Peso entre 1 y 5 unidades
+        return round(x), round(y), waste_type, weight
+
+    def add_waste(self, x, y, waste_type, weight=1):
+        """Crear un residuo en el almacén y ponerlo en el mapa"""
+        point = WastePoint.create(self.waste_store, x=x, y=y, waste_type=waste_type, weight=weight)
+        self.spawn_waste(point)
+        return point
+
+    @staticmethod
+    def index_cell_size(num_points):
+        """Tamaño de cubeta para unos pocos residuos por cubeta"""
+        return max(10, min(100, int(math.sqrt(WIDTH * HEIGHT / max(num_points, 1)) * 2)))
+
+    def pending_waste(self):
+        """Residuos aún no recolectados (disponibles o reservados)"""
+        return len(self.waste_points)
+
+    def spawn_waste(self, point):
+        """Añadir un nuevo residuo al entorno"""
+        self.waste_points[point] = None
+        self.waste_index.add(point)
+        self.spawned_count += 1
+        self.revision += 1
+        if self.waste_changes is not None:
+            self.waste_changes.append((point, False))
+
+    def reserve_waste(self, point):
+        """Reservar un residuo para un agente; deja de estar disponible"""
+        point.reserved = True
+        self.waste_index.remove(point)
+        self.revision += 1
+
+    def release_waste(self, point):
+        """Liberar la reserva de un residuo aún no recolectado"""
+        point.reserved = False
+        if not point.collected:
+            self.waste_index.add(point)
+        self.revision += 1
+
+    def collect_waste(self, point):
+        """Marcar un residuo como recolectado y sacarlo del conjunto vivo.
+
+        La vista conserva posición, tipo y peso para el resto del recorrido
+        (recolector, camión, centro); su fila del almacén queda libre.
+        """
+        point.collected = True
+        point.reserved = False  # Libera la reserva
+        self.waste_index.remove(point)
+        del self.waste_points[point]
+        self.waste_store.free(point.index)
+        self.collected_count += 1
+        self.revision += 1
+        if self.waste_changes is not None:
+            self.waste_changes.append((point, True))
+
+    def generate_centers(self):
+        centers = [
+            TreatmentCenter(x=100, y=100, waste_type='orgánico', color=GREEN),
+            TreatmentCenter(x=400, y=100, waste_type='inorgánico', color=BLUE),
+            TreatmentCenter(x=700, y=100, waste_type='otro', color=YELLOW)
+        ]
+        # En una red viaria cada centro se ubica en el nodo más cercano
+        for center in centers:
+            center.x, center.y = self.pathfinder.snap((center.x, center.y))
+        return centers
+
+# Puntos de Residuos
+class WastePoint:
+    """Vista ligera de un residuo guardado en las columnas de un WasteStore.
+
+    Posición, tipo y peso no cambian y se copian en la vista, que sigue siendo
+    válida después de recolectar el residuo y liberar su fila. Las banderas
+    se leen del almacén y solo tienen sentido mientras el residuo está vivo.
+    """
+    __slots__ = ('store', 'index', 'x', 'y', 'waste_type', 'weight')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+        self.x = int(store.x[index])
+        self.y = int(store.y[index])
+        self.waste_type = WASTE_TYPES[store.type_code[index]]
+        self.weight = float(store.weight[index])
+
+    @classmethod
+    def create(cls, store, x, y, waste_type, weight):
+        """Añadir un residuo al almacén y devolver su vista"""
+        return cls(store, store.add(x, y, waste_type, weight))
+
+    @classmethod
+    def detached(cls, store, x, y, waste_type, weight):
+        """Vista de un residuo ya recolectado, sin fila en el almacén (al restaurar un punto de control)"""
+        point = cls.__new__(cls)
+        point.store = store
+        point.index = -1
+        point.x = x
+        point.y = y
+        point.waste_type = waste_type
+        point.weight = weight
+        return point
+
+    @property
+    def collected(self):
+        return bool(self.store.collected[self.index])
+
+    @collected.setter
+    def collected(self, value):
+        self.store.collected[self.index] = value
+
+    @property
+    def reserved(self):
+        return bool(self.store.reserved[self.index])
+
+    @reserved.setter
+    def reserved(self, value):
+        self.store.reserved[self.index] = value
+
+# Centros de Tratamiento
+class TreatmentCenter:
+    def __init__(self, x, y, waste_type, color):
+        self.x = x
+        self.y = y
+        self.color = color
+        self.waste_type = waste_type
+        self.capacity = 10000  # Capacidad máxima
+        # Contadores en lugar de la lista de residuos: memoria constante en ejecuciones largas
+        self.received_count = 0
+        self.received_weight = 0.0
+
+    def store_waste(self, waste):
+        """Almacenar un residuo; devuelve False si el centro está lleno"""
+        if self.received_count >= self.capacity:
+            return False
+        self.received_count += 1
+        self.received_weight += waste.weight
+        return True
+
+    def store_batch(self, wastes):
+        """Almacenar un lote de residuos hasta llenar el centro; devuelve cuántos se guardaron"""
+        stored = min(len(wastes), max(self.capacity - self.received_count, 0))
+        self.received_count += stored
+        self.received_weight += sum(waste.weight for waste in wastes[:stored])
+        return stored
+
+# Estación Central
+class CentralStation:
+    def __init__(self, classification_agents, log=None):
+        self.log = log if log is not None else EventLog.disabled()
+        self.transport_agents = []  # Flota de camiones registrados por TransportAgent
+        self.classification_agents = classification_agents  # Agentes de clasificación asociados
+        # Reparto directo por tipo de residuo y por centro, sin recorrer la lista
+        self.classifiers_by_type = {agent.associated_center.waste_type: agent for agent in classification_agents}
+        self.classifiers_by_center = {agent.associated_center: agent for agent in classification_agents}
+
+    def register_transport_agent(self, transport_agent):
+        self.transport_agents.append(transport_agent)
+
+    def assign_truck(self, collector):
+        """Asignar al recolector el camión más cercano con capacidad libre.
+
+        Reserva en el camión la carga del recolector para que otros no lo
+        sobrecarguen mientras va de camino; devuelve None si no hay ninguno.
+        En ese caso los camiones parados con carga parcial y sin nadie en
+        camino salen hacia los centros: con cargas de varios residuos el
+        hueco que les queda podría no llenarse nunca.
+        """
+        load = len(collector.collected_waste)
+        best = None
+        best_dist = math.inf
+        for truck in self.transport_agents:
+            if truck.free_capacity() >= load:
+                dist = math.hypot(truck.home[0] - collector.x, truck.home[1] - collector.y)
+                if dist < best_dist:
+                    best = truck
+                    best_dist = dist
+        if best is not None:
+            best.reserved_load += load
+        else:
+            for truck in self.transport_agents:
+                if truck.state == 'waiting' and truck.current_load > 0 and truck.reserved_load == 0:
+                    truck.request_departure()
+        return best
+
+    def release_truck(self, truck, load):
+        """Liberar la capacidad reservada en un camión"""
+        truck.reserved_load -= load
+
+    def fleet_metrics(self):
+        """Métricas de utilización por camión"""
+        metrics = []
+        for truck in self.transport_agents:
+            state_ticks = truck.state_durations()
+            total_ticks = sum(state_ticks.values())
+            busy_ticks = total_ticks - state_ticks.get('waiting', 0)
+            metrics.append({
+                'name': truck.name,
+                'capacity': truck.capacity,
+                'trips': truck.trips,
+                'items_received': truck.items_received,
+                'busy_fraction': busy_ticks / total_ticks if total_ticks else 0.0,
+                'mean_load_per_trip': truck.items_loaded_on_trips / truck.trips if truck.trips else 0.0,
+                'distance': truck.distance_travelled,
+                'blocked_ticks': truck.blocked_ticks,
+                'state_ticks': state_ticks,
+            })
+        return metrics
+
+    def assign_waste_to_classification(self, wastes):
+        """Asignar residuos al agente clasificador adecuado, en un lote por tipo"""
+        batches = {}
+        for waste in wastes:
+            batches.setdefault(waste.waste_type, []).append(waste)
+        for waste_type, batch in batches.items():
+            agent = self.classifiers_by_type.get(waste_type)
+            if agent is not None:
+                agent.receive_waste(batch)
+                if self.log.enabled:
+                    self.log.debug('assigned', "CentralStation asignó {count} residuos de tipo {waste_type} al {agent}.",
+                                   count=len(batch), waste_type=waste_type, agent=agent.name)
+            elif self.log.enabled:
+                self.log.warning('unassigned', "CentralStation no encontró un agente adecuado para el residuo de tipo {waste_type}.",
+                                 waste_type=waste_type)
+
+    def classification_metrics(self, ticks):
+        """Métricas de rendimiento por clasificador tras `ticks` ticks de simulación"""
+        ticks = max(ticks, 1)
+        metrics = []
+        for agent in self.classification_agents:
+            center = agent.associated_center
+            metrics.append({
+                'name': agent.name,
+                'service_rate': agent.service_rate,
+                'queue_capacity': agent.queue_capacity,
+                'classified': agent.classified,
+                'discarded': agent.discarded,
+                'throughput': agent.classified / ticks,
+                'utilization': agent.busy_ticks / ticks,
+                'mean_queue': agent.queue_ticks / ticks,
+                'max_queue': agent.max_queue,
+                'queued': len(agent.received_waste),
+                'center_fill': center.received_count / center.capacity,
+            })
+        return metrics
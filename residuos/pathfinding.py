@@ -0,0 +1,539 @@
+"""Búsqueda de rutas compartida por los agentes de la simulación."""
+import heapq
+import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class Grid:
+    """Cuadrícula 4-conexa sobre el mapa, con celdas de `cell_size` píxeles"""
+    def __init__(self, width, height, cell_size):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        # Celdas con 0 <= n * cell_size < ancho/alto
+        self.cols = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.blocked = set()  # Celdas intransitables (cierres de calles)
+        self.version = 0  # Se incrementa con cada cambio de topología
+        self.changes = []  # (versión, celdas cambiadas), para la replanificación incremental
+
+    def to_cell(self, pos):
+        """Celda (columna, fila) que contiene una posición en píxeles"""
+        return (int(pos[0] // self.cell_size), int(pos[1] // self.cell_size))
+
+    def to_point(self, cell):
+        """Centro en píxeles de una celda"""
+        half = self.cell_size // 2
+        return (cell[0] * self.cell_size + half, cell[1] * self.cell_size + half)
+
+    def in_bounds(self, cell):
+        return 0 <= cell[0] < self.cols and 0 <= cell[1] < self.rows
+
+    def set_blocked(self, cells, blocked=True):
+        """Bloquear o desbloquear celdas; invalida las rutas calculadas antes.
+
+        Devuelve las celdas que cambiaron de verdad (vacío si ninguna).
+        """
+        if blocked:
+            changed = {cell for cell in cells if cell not in self.blocked and self.in_bounds(cell)}
+            self.blocked.update(changed)
+        else:
+            changed = {cell for cell in cells if cell in self.blocked}
+            self.blocked.difference_update(changed)
+        if changed:
+            self.version += 1
+            self.changes.append((self.version, frozenset(changed)))
+        return changed
+
+    def changes_since(self, version):
+        """Celdas cambiadas después de `version`"""
+        cells = set()
+        for changed_version, changed in reversed(self.changes):
+            if changed_version <= version:
+                break
+            cells.update(changed)
+        return cells
+
+    def adjacent(self, cell):
+        """Celdas 4-vecinas dentro del mapa, estén o no bloqueadas"""
+        x, y = cell
+        result = []
+        if x > 0:
+            result.append((x - 1, y))
+        if x < self.cols - 1:
+            result.append((x + 1, y))
+        if y > 0:
+            result.append((x, y - 1))
+        if y < self.rows - 1:
+            result.append((x, y + 1))
+        return result
+
+    def neighbors(self, cell):
+        """Celdas a las que se puede pasar; de una celda bloqueada se puede salir, pero no entrar"""
+        result = self.adjacent(cell)
+        if self.blocked:
+            result = [n for n in result if n not in self.blocked]
+        return result
+
+    def cost(self, a, b):
+        return 1  # En cuadrícula, cada movimiento tiene un coste uniforme
+
+
+def heuristic(a, b):
+    """Distancia Manhattan, admisible en una cuadrícula 4-conexa de coste unitario"""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def a_star(grid, start, goal):
+    """A* con cola de prioridad binaria entre dos celdas.
+
+    Devuelve la lista de celdas desde la siguiente a `start` hasta `goal`
+    (vacía si ya está en la meta o si la meta es inalcanzable) y el número
+    de celdas expandidas.
+    """
+    if start == goal:
+        return [], 0
+
+    # Entradas (f, -g, celda): a igual f se expande primero la más profunda,
+    # lo que evita recorrer toda la meseta de empates de la distancia Manhattan
+    frontier = [(heuristic(start, goal), 0, start)]
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+    expansions = 0
+
+    while frontier:
+        _, neg_cost, current = heapq.heappop(frontier)
+        cost = -neg_cost
+        if current == goal:
+            break
+        if cost > cost_so_far[current]:
+            continue  # Entrada obsoleta del montículo
+        expansions += 1
+
+        for next in grid.neighbors(current):
+            new_cost = cost + grid.cost(current, next)
+            if new_cost < cost_so_far.get(next, new_cost + 1):
+                cost_so_far[next] = new_cost
+                came_from[next] = current
+                heapq.heappush(frontier, (new_cost + heuristic(next, goal), -new_cost, next))
+    else:
+        return [], expansions
+
+    # Reconstruir el camino de la meta hacia atrás y darle la vuelta una sola vez
+    path = []
+    current = goal
+    while current != start:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path, expansions
+
+
+class DistanceField:
+    """Campo de distancias (flow field) de todas las celdas hacia un destino fijo.
+
+    Se calcula una sola vez con una BFS inversa desde el destino; después cada
+    agente obtiene su siguiente paso leyendo el gradiente en O(1). Los cierres
+    y reaperturas de celdas se reparan localmente con `update`.
+    """
+    UNREACHABLE = np.iinfo(np.int32).max
+    REPAIR_FRACTION = 16  # Con más de 1/16 de las celdas cambiadas sale más barato reconstruir
+
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.goal = goal
+        self.build()
+
+    def build(self):
+        """BFS por frentes de onda vectorizada (índices planos de celda)"""
+        grid = self.grid
+        cols, rows = grid.cols, grid.rows
+        dist = np.full(rows * cols, self.UNREACHABLE, dtype=np.int32)
+        for x, y in grid.blocked:
+            dist[y * cols + x] = -1  # Marca temporal: nunca se visita
+
+        gx, gy = self.goal
+        frontier = np.array([gy * cols + gx], dtype=np.int64)
+        dist[frontier] = 0
+        if self.goal in grid.blocked:
+            frontier = frontier[:0]  # En una celda cerrada no se puede entrar
+        step = 0
+        while frontier.size:
+            step += 1
+            col = frontier % cols
+            candidates = np.concatenate((
+                frontier[col > 0] - 1,
+                frontier[col < cols - 1] + 1,
+                frontier[frontier >= cols] - cols,
+                frontier[frontier < (rows - 1) * cols] + cols,
+            ))
+            candidates = candidates[dist[candidates] == self.UNREACHABLE]
+            frontier = np.unique(candidates)
+            dist[frontier] = step
+        dist[dist == -1] = self.UNREACHABLE
+
+        self.dist = dist.reshape(rows, cols)
+        self.version = grid.version
+
+    def update(self):
+        """Poner el campo al día con la cuadrícula: reparación local si cambiaron pocas celdas"""
+        grid = self.grid
+        if self.version == grid.version:
+            return
+        changed = grid.changes_since(self.version)
+        if self.goal in changed or len(changed) > self.dist.size // self.REPAIR_FRACTION:
+            self.build()
+            return
+        self.repair(changed)
+        self.version = grid.version
+
+    def repair(self, changed):
+        """Actualizar solo las distancias que cambian al cerrar o abrir `changed`.
+
+        Primero se invalidan, en orden de distancia, las celdas que solo se
+        apoyaban en celdas cerradas o invalidadas; después se propagan desde
+        su borde y desde las celdas reabiertas las distancias que disminuyen.
+        """
+        grid = self.grid
+        dist = self.dist
+        UNREACHABLE = self.UNREACHABLE
+        blocked = grid.blocked
+
+        # Cierres: invalidar las celdas que se quedan sin un vecino a distancia d - 1
+        pending = []
+        invalid = []
+        for x, y in changed:
+            if (x, y) in blocked and dist[y, x] != UNREACHABLE:
+                dist[y, x] = UNREACHABLE
+                for nx, ny in grid.neighbors((x, y)):
+                    heapq.heappush(pending, (int(dist[ny, nx]), (nx, ny)))
+        while pending:
+            d, cell = heapq.heappop(pending)
+            x, y = cell
+            if d == 0 or dist[y, x] != d:
+                continue  # Destino, ya invalidada o inalcanzable
+            if any(dist[ny, nx] == d - 1 for nx, ny in grid.neighbors(cell)):
+                continue  # Sigue apoyada en un vecino válido
+            dist[y, x] = UNREACHABLE
+            invalid.append(cell)
+            for nx, ny in grid.neighbors(cell):
+                if dist[ny, nx] == d + 1:
+                    heapq.heappush(pending, (d + 1, (nx, ny)))
+
+        # Candidatas: celdas invalidadas y reabiertas, desde su mejor vecino válido
+        frontier = []
+        candidates = invalid + [cell for cell in changed if cell not in blocked]
+        for cell in candidates:
+            best = min((int(dist[ny, nx]) for nx, ny in grid.neighbors(cell)), default=UNREACHABLE)
+            if best != UNREACHABLE:
+                heapq.heappush(frontier, (best + 1, cell))
+
+        # Propagar las disminuciones de distancia (Dijkstra con coste unitario)
+        while frontier:
+            d, cell = heapq.heappop(frontier)
+            x, y = cell
+            if d >= dist[y, x]:
+                continue
+            dist[y, x] = d
+            for nx, ny in grid.neighbors(cell):
+                if d + 1 < dist[ny, nx]:
+                    heapq.heappush(frontier, (d + 1, (nx, ny)))
+
+    def distance(self, cell):
+        """Pasos hasta el destino, o UNREACHABLE"""
+        return int(self.dist[cell[1], cell[0]])
+
+    def next_cell(self, cell):
+        """Vecino que desciende por el gradiente (None en el destino o si es inalcanzable).
+
+        Desde una celda bloqueada (distancia UNREACHABLE) se sale al primer
+        vecino con distancia conocida.
+        """
+        best = self.dist[cell[1], cell[0]]
+        if best == 0:
+            return None
+        for next in self.grid.neighbors(cell):
+            if self.dist[next[1], next[0]] < best:
+                return next
+        return None
+
+    def path_from(self, cell):
+        """Celdas desde la siguiente a `cell` hasta el destino siguiendo el gradiente"""
+        path = []
+        current = self.next_cell(cell)
+        while current is not None:
+            path.append(current)
+            current = self.next_cell(current)
+        return path
+
+
+class DStarLite:
+    """Planificador incremental D* Lite de una ruta con meta fija y origen móvil.
+
+    Busca hacia atrás desde la meta y guarda g/rhs de las celdas expandidas.
+    Tras cerrar o abrir celdas, `replan` solo reexpande las celdas cuya
+    distancia a la meta cambia, en vez de repetir la búsqueda completa.
+    """
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.goal = goal
+        self.start = start
+        self.last = start  # Origen al calcular el último desplazamiento de claves
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.open = {}  # Celda -> clave vigente en el montículo (las demás entradas están obsoletas)
+        self.heap = []
+        self.version = grid.version
+        self.expansions = 0
+        self.push(goal)
+        self.compute()
+
+    def key(self, cell):
+        m = min(self.g.get(cell, math.inf), self.rhs.get(cell, math.inf))
+        return (m + heuristic(self.start, cell) + self.km, m)
+
+    def push(self, cell):
+        key = self.key(cell)
+        self.open[cell] = key
+        heapq.heappush(self.heap, (key, cell))
+
+    def update(self, cell):
+        """Recalcular rhs de una celda y ponerla en la cola si queda inconsistente"""
+        if cell != self.goal:
+            g = self.g
+            best = math.inf
+            for next in self.grid.neighbors(cell):
+                cost = g.get(next, math.inf) + 1
+                if cost < best:
+                    best = cost
+            self.rhs[cell] = best
+        if self.g.get(cell, math.inf) != self.rhs.get(cell, math.inf):
+            self.push(cell)
+        else:
+            self.open.pop(cell, None)
+
+    def predecessors(self, cell):
+        """Celdas desde las que se entra en `cell` (ninguna si está bloqueada)"""
+        if cell in self.grid.blocked:
+            return []
+        return self.grid.adjacent(cell)
+
+    def compute(self):
+        g, rhs, heap, open = self.g, self.rhs, self.heap, self.open
+        start = self.start
+        while heap:
+            key, cell = heap[0]
+            if open.get(cell) != key:
+                heapq.heappop(heap)  # Entrada obsoleta
+                continue
+            if key >= self.key(start) and rhs.get(start, math.inf) == g.get(start, math.inf):
+                break
+            heapq.heappop(heap)
+            new_key = self.key(cell)
+            if key < new_key:
+                self.push(cell)
+                continue
+            self.expansions += 1
+            del open[cell]
+            if g.get(cell, math.inf) > rhs[cell]:
+                g[cell] = rhs[cell]
+                for previous in self.predecessors(cell):
+                    self.update(previous)
+            else:
+                g[cell] = math.inf
+                self.update(cell)
+                for previous in self.predecessors(cell):
+                    self.update(previous)
+
+    def replan(self, start):
+        """Mover el origen y aplicar los cambios de la cuadrícula desde la última búsqueda"""
+        self.km += heuristic(self.last, start)
+        self.last = self.start = start
+        grid = self.grid
+        if grid.version != self.version:
+            # Cambian las aristas que entran en cada celda cambiada: actualizar a sus vecinos
+            for changed in grid.changes_since(self.version):
+                for cell in grid.adjacent(changed):
+                    self.update(cell)
+            self.version = grid.version
+        self.compute()
+
+    def path(self):
+        """Celdas desde la siguiente al origen hasta la meta, o None si es inalcanzable"""
+        g = self.g
+        cell = self.start
+        remaining = g.get(cell, math.inf) if cell != self.goal else 0
+        if remaining == math.inf:
+            return None
+        path = []
+        while cell != self.goal:
+            best = None
+            for next in self.grid.neighbors(cell):
+                if g.get(next, math.inf) < remaining:
+                    best, remaining = next, g[next]
+            if best is None:
+                return None
+            path.append(best)
+            cell = best
+        return path
+
+
+class PathCache:
+    """Caché LRU acotada de rutas, con contadores de aciertos y fallos"""
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.version = 0  # Versión de la cuadrícula de las entradas guardadas
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        path = self.entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def put(self, key, path):
+        self.entries[key] = path
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def sync(self, version):
+        """Descartar las entradas de versiones anteriores de la cuadrícula"""
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class Pathfinder:
+    """Servicio de rutas en píxeles sobre una cuadrícula.
+
+    Las rutas salen de los campos de distancias o de A* con caché. Cuando un
+    cierre afecta a la ruta de un agente, `repair_path` la recalcula con
+    D* Lite y conserva el planificador bajo la clave del agente, de modo que
+    los cierres siguientes solo reexpanden lo que cambia.
+    """
+    def __init__(self, grid, cache_size=1024):
+        self.grid = grid
+        self.cache = PathCache(cache_size)
+        self.fields = {}  # Celda destino -> DistanceField
+        self.planners = {}  # Clave de la ruta (agente) -> DStarLite
+        self.queries = 0
+        self.repairs = 0
+        self.expansions = 0  # Celdas expandidas por A* y D* Lite
+        self.waypoints = 0  # Waypoints devueltos en total (longitud acumulada de las rutas)
+        self.search_time = 0.0  # Segundos acumulados en find_path y repair_path
+
+    def node_of(self, pos):
+        """Celda de una posición (el nodo del grafo de búsqueda)"""
+        return self.grid.to_cell(pos)
+
+    def snap(self, pos):
+        """En la cuadrícula cualquier posición es válida: se devuelve tal cual"""
+        return pos
+
+    def add_destination(self, goal):
+        """Precalcular el campo de distancias hacia un destino fijo en píxeles"""
+        cell = self.grid.to_cell(goal)
+        if cell not in self.fields:
+            self.fields[cell] = DistanceField(self.grid, cell)
+        return self.fields[cell]
+
+    def field(self, cell):
+        """Campo de distancias hacia una celda destino (reconstruido si el mapa cambió), o None"""
+        field = self.fields.get(cell)
+        if field is not None:
+            field.update()
+        return field
+
+    def travel_cost(self, start, goal):
+        """Coste en pasos entre dos posiciones: exacto si el destino tiene campo, Manhattan si no"""
+        start_cell = self.grid.to_cell(start)
+        goal_cell = self.grid.to_cell(goal)
+        field = self.field(goal_cell)
+        if field is not None:
+            return field.distance(start_cell)
+        return heuristic(start_cell, goal_cell)
+
+    def find_path(self, start, goal, key=None):
+        """Ruta de waypoints (centros de celda) entre dos posiciones en píxeles"""
+        started = time.perf_counter()
+        self.queries += 1
+        try:
+            path = self._find_path(start, goal, key)
+            self.waypoints += len(path)
+            return path
+        finally:
+            self.search_time += time.perf_counter() - started
+
+    def _find_path(self, start, goal, key):
+        grid = self.grid
+        start_cell = grid.to_cell(start)
+        goal_cell = grid.to_cell(goal)
+        to_point = grid.to_point
+
+        # Una ruta nueva descarta el planificador incremental de la anterior
+        self.planners.pop(key, None)
+
+        # Destinos fijos: seguir el gradiente del campo precalculado, sin búsqueda
+        field = self.field(goal_cell)
+        if field is not None:
+            return [to_point(cell) for cell in field.path_from(start_cell)]
+
+        # La versión forma parte de la clave: un cambio de topología invalida la caché
+        self.cache.sync(grid.version)
+        cache_key = (start_cell, goal_cell, grid.version)
+        path = self.cache.get(cache_key)
+        if path is None:
+            cells, expansions = a_star(grid, start_cell, goal_cell)
+            self.expansions += expansions
+            path = tuple(to_point(cell) for cell in cells)
+            self.cache.put(cache_key, path)
+        return list(path)  # Copia: los agentes consumen su ruta
+
+    def repair_path(self, key, start, goal):
+        """Reparar tras un cambio del mapa la ruta de `key` hacia `goal`.
+
+        Reutiliza el planificador D* Lite de la ruta si ya existe (solo se
+        reexpande lo que el cambio afecta) y devuelve None si la meta ha
+        quedado inalcanzable.
+        """
+        started = time.perf_counter()
+        self.repairs += 1
+        try:
+            grid = self.grid
+            start_cell = grid.to_cell(start)
+            goal_cell = grid.to_cell(goal)
+            field = self.field(goal_cell)
+            if field is not None:
+                path = field.path_from(start_cell)
+            else:
+                planner = self.planners.get(key)
+                if planner is None or planner.goal != goal_cell:
+                    planner = self.planners[key] = DStarLite(grid, start_cell, goal_cell)
+                    self.expansions += planner.expansions
+                else:
+                    before = planner.expansions
+                    planner.replan(start_cell)
+                    self.expansions += planner.expansions - before
+                path = planner.path()
+            if not path and start_cell != goal_cell:
+                return None
+            self.waypoints += len(path)
+            return [grid.to_point(cell) for cell in path]
+        finally:
+            self.search_time += time.perf_counter() - started
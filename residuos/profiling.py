@@ -0,0 +1,190 @@
+"""Instrumentación por tick: tiempos por fase, contadores de rutas y ocupación de estados."""
+import math
+import time
+from collections import Counter, deque
+
+# Fases medidas en cada tick, en el orden en que se ejecutan
+PHASES = ('arrivals', 'assignment', 'collector.perceive', 'collector.decide', 'truck.perceive', 'movement',
+          'classification', 'observers')
+# Contadores de búsqueda de rutas (incremento en el tick)
+COUNTERS = ('path_queries', 'path_expansions', 'path_waypoints')
+COLUMNS = ('tick',) + PHASES + COUNTERS
+
+
+class Profiler:
+    """Perfilador de ticks con búfer circular en memoria y volcado por lotes a CSV.
+
+    Se engancha con `simulation.profiler = Profiler()`; mientras sea None la
+    simulación no mide nada. Cada tick deja una fila (tick, segundos por
+    fase, consultas, expansiones y waypoints de búsqueda de rutas) y se
+    acumulan los agente-ticks por estado y la duración de cada estancia en
+    un estado (p. ej. cuánto espera un recolector en 'waiting_for_truck').
+    """
+    def __init__(self, buffer_size=10_000, path=None, batch_size=1_000):
+        self.buffer = deque(maxlen=buffer_size)  # Filas de los últimos ticks, con COLUMNS
+        self.batch_size = batch_size
+        self.pending = []
+        self.file = open(path, 'a', encoding='utf-8') if path else None
+        if self.file is not None and self.file.tell() == 0:
+            self.file.write(','.join(COLUMNS) + '\n')
+        self.ticks = 0
+        self.totals = [0.0] * (len(PHASES) + len(COUNTERS))
+        self.occupancy = Counter()  # (tipo de agente, estado) -> agente-ticks
+        self.stays = {}  # (tipo de agente, estado) -> Counter(duración en ticks -> estancias)
+        self.current = {}  # Agente -> (estado, tick de entrada) observados al cerrar el tick
+
+    def step(self, simulation, n=1, until=None):
+        """Avanzar `n` ticks como `Simulation.step`, midiendo cada fase"""
+        clock = time.perf_counter
+        pathfinder = simulation.environment.pathfinder
+        for _ in range(n):
+            counters = (pathfinder.queries, pathfinder.expansions, pathfinder.waypoints)
+            # Mismas fases y orden que `Simulation.run_tick`, con un reloj entre cada una
+            start = clock()
+            simulation.spawn_arrivals()
+            arrivals_done = clock()
+            simulation.assign_idle()
+            assigned = clock()
+            perceive, decide = simulation.update_collectors(clock)
+            trucks_started = clock()
+            simulation.update_trucks()
+            trucks_done = clock()
+            simulation.move_agents()
+            moved = clock()
+            simulation.classify()
+            classified = clock()
+
+            tick = simulation.tick
+            self.sample_states(simulation, tick)
+            observers_started = clock()
+            simulation.finish_tick()
+            finished = clock()
+
+            self.record((
+                tick,
+                arrivals_done - start,
+                assigned - arrivals_done,
+                perceive,
+                decide,
+                trucks_done - trucks_started,
+                moved - trucks_done,
+                classified - moved,
+                finished - observers_started,
+                pathfinder.queries - counters[0],
+                pathfinder.expansions - counters[1],
+                pathfinder.waypoints - counters[2],
+            ))
+            if until is not None and until(simulation):
+                break
+        return simulation.tick
+
+    def sample_states(self, simulation, tick):
+        """Contar el estado de cada agente al cerrar el tick y las estancias terminadas"""
+        occupancy = self.occupancy
+        current = self.current
+        for kind, agents in (('collector', simulation.collection_agents), ('truck', simulation.transport_agents)):
+            for agent in agents:
+                state = agent.state
+                occupancy[(kind, state)] += 1
+                previous = current.get(agent)
+                if previous is None:
+                    current[agent] = (state, tick)
+                elif previous[0] != state:
+                    self.stays.setdefault((kind, previous[0]), Counter())[tick - previous[1]] += 1
+                    current[agent] = (state, tick)
+
+    def record(self, row):
+        self.ticks += 1
+        totals = self.totals
+        for i, value in enumerate(row[1:]):
+            totals[i] += value
+        self.buffer.append(row)
+        if self.file is not None:
+            self.pending.append(row)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def rows(self, column=None):
+        """Filas retenidas en el búfer, o solo los valores de una columna"""
+        if column is None:
+            return list(self.buffer)
+        i = COLUMNS.index(column)
+        return [row[i] for row in self.buffer]
+
+    def stay_stats(self, kind, state):
+        """Número, media, percentiles 50/90 y máximo de las estancias terminadas en un estado"""
+        histogram = self.stays.get((kind, state))
+        if not histogram:
+            return None
+        count = sum(histogram.values())
+        durations = sorted(histogram.items())
+
+        def percentile(q):
+            rank = math.ceil(q * count)
+            seen = 0
+            for duration, times in durations:
+                seen += times
+                if seen >= rank:
+                    return duration
+
+        return {
+            'count': count,
+            'mean': sum(duration * times for duration, times in durations) / count,
+            'p50': percentile(0.5),
+            'p90': percentile(0.9),
+            'max': durations[-1][0],
+        }
+
+    def summary(self):
+        """Resumen acumulado: tiempos por fase, contadores de rutas y ocupación de estados"""
+        ticks = max(self.ticks, 1)
+        phase_totals = dict(zip(PHASES, self.totals))
+        measured = sum(phase_totals.values()) or 1.0
+        queries, expansions, waypoints = self.totals[len(PHASES):]
+        agent_ticks = Counter()
+        for (kind, _), count in self.occupancy.items():
+            agent_ticks[kind] += count
+        return {
+            'ticks': self.ticks,
+            'phases': {phase: {'seconds': seconds, 'per_tick': seconds / ticks, 'share': seconds / measured}
+                       for phase, seconds in phase_totals.items()},
+            'path': {
+                'queries': int(queries),
+                'expansions': int(expansions),
+                'waypoints': int(waypoints),
+                'expansions_per_query': expansions / queries if queries else 0.0,
+                'mean_path_length': waypoints / queries if queries else 0.0,
+            },
+            'occupancy': {f"{kind}.{state}": count / agent_ticks[kind]
+                          for (kind, state), count in sorted(self.occupancy.items())},
+            'stays': {f"{kind}.{state}": self.stay_stats(kind, state) for kind, state in sorted(self.stays)},
+        }
+
+    def report(self):
+        """Resumen en texto, una línea por fase, contador y estado"""
+        summary = self.summary()
+        lines = [f"Perfil de {summary['ticks']} ticks"]
+        for phase, values in summary['phases'].items():
+            lines.append(f"  {phase:>20}: {values['seconds']:9.3f} s  {values['per_tick'] * 1e6:9.1f} µs/tick  "
+                         f"{values['share']:6.1%}")
+        path = summary['path']
+        lines.append(f"  rutas: {path['queries']} consultas, {path['expansions_per_query']:.1f} expansiones "
+                     f"y {path['mean_path_length']:.1f} waypoints por consulta")
+        for state, fraction in summary['occupancy'].items():
+            stays = summary['stays'].get(state)
+            detail = f"  estancias {stays['count']}, media {stays['mean']:.1f}, p90 {stays['p90']}" if stays else ""
+            lines.append(f"  {state:>28}: {fraction:6.1%}{detail}")
+        return '\n'.join(lines)
+
+    def flush(self):
+        """Escribir en el CSV las filas pendientes en una sola operación"""
+        if self.file is None or not self.pending:
+            return
+        self.file.write(''.join(','.join(str(value) for value in row) + '\n' for row in self.pending))
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
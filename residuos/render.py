@@ -0,0 +1,290 @@
+"""Renderizado con Pygame; es el único módulo que importa pygame."""
+from collections import OrderedDict
+
+import pygame
+
+from .config import BLACK, BLUE, BROWN, FPS, GRAY, GREEN, HEIGHT, ORANGE, WHITE, WIDTH, YELLOW
+
+# Caché de fuentes y textos renderizados
+class TextCache:
+    """Fuentes resueltas una sola vez y superficies de texto en una caché LRU.
+
+    Las superficies se indexan por (fuente, tamaño, texto, color), de modo que
+    un texto que no cambia entre fotogramas se reduce a un blit.
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.fonts = {}  # (nombre, tamaño) -> pygame.font.Font
+        self.surfaces = OrderedDict()
+
+    def font(self, name, size):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def render(self, name, size, text, color=BLACK):
+        key = (name, size, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = self.font(name, size).render(text, True, color)
+            if len(self.surfaces) > self.maxsize:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+TEXT_CACHE = TextCache()
+
+LIGHT_GRAY = (220, 220, 220)  # Calles de la red viaria
+
+# Color de cada tipo de residuo
+WASTE_COLORS = {'orgánico': GREEN, 'inorgánico': BLUE, 'otro': YELLOW}
+
+
+def draw_waste(window, point):
+    """Dibujar un residuo y devolver su rectángulo.
+
+    Solo usa posición y tipo, que viajan en la vista: la fila del almacén de
+    un residuo ya recolectado puede estar libre o ser de otro.
+    """
+    return pygame.draw.circle(window, WASTE_COLORS[point.waste_type], (point.x, point.y), 5)
+
+
+def draw_roads(window, network):
+    """Dibujar las calles de una red viaria (una línea por tramo)"""
+    x = network.x.tolist()
+    y = network.y.tolist()
+    indptr = network.indptr.tolist()
+    indices = network.indices.tolist()
+    for node in range(len(x)):
+        for i in range(indptr[node], indptr[node + 1]):
+            next = indices[i]
+            if next > node or not network.symmetric:
+                pygame.draw.line(window, LIGHT_GRAY, (x[node], y[node]), (x[next], y[next]))
+
+
+def draw_center(window, center):
+    """Dibujar un centro de tratamiento como una casa sencilla"""
+    rect = pygame.draw.rect(window, center.color, (center.x - 10, center.y, 20, 20))  # Cuerpo de la casa
+    rect.union_ip(pygame.draw.polygon(window, BROWN, [(center.x - 15, center.y), (center.x + 15, center.y), (center.x, center.y - 20)]))  # Techo
+    # Dibujar el texto del tipo de residuo
+    text_surface = TEXT_CACHE.render('Arial', 14, center.waste_type.capitalize())
+    rect.union_ip(window.blit(text_surface, (center.x - 20, center.y - 30)))
+    return rect
+
+
+def draw_collector(window, agent):
+    """Dibujar un recolector como una figura humana con sus residuos en la mano"""
+    x, y = int(agent.x), int(agent.y)
+    rect = pygame.draw.circle(window, BLACK, (x, y - 10), 5)  # Cabeza
+    rect.union_ip(pygame.draw.line(window, BLACK, (x, y - 5), (x, y + 10), 2))  # Cuerpo
+    rect.union_ip(pygame.draw.line(window, BLACK, (x, y + 10), (x - 5, y + 20), 2))  # Pierna izquierda
+    rect.union_ip(pygame.draw.line(window, BLACK, (x, y + 10), (x + 5, y + 20), 2))  # Pierna derecha
+    rect.union_ip(pygame.draw.line(window, BLACK, (x, y), (x - 5, y + 5), 2))  # Brazo izquierdo
+    rect.union_ip(pygame.draw.line(window, BLACK, (x, y), (x + 5, y + 5), 2))  # Brazo derecho
+
+    # Residuos en la mano derecha
+    offset_step = 5  # Espaciado entre residuos
+    for i, waste in enumerate(agent.collected_waste):
+        pos_x = x + 5 + (i % 2) * offset_step
+        pos_y = y + 5 + (i // 2) * offset_step
+        rect.union_ip(pygame.draw.circle(window, WASTE_COLORS[waste.waste_type], (pos_x, pos_y), 7))
+    return rect
+
+
+def draw_truck(window, truck):
+    """Dibujar el camión con los residuos que lleva a bordo"""
+    x, y = int(truck.x), int(truck.y)
+    rect = pygame.draw.rect(window, ORANGE, (x - 10, y - 5, 20, 10))  # Cuerpo del camión
+    rect.union_ip(pygame.draw.rect(window, GRAY, (x - 15, y - 5, 5, 10)))  # Cabina
+    rect.union_ip(pygame.draw.circle(window, BLACK, (x - 5, y + 5), 3))  # Rueda trasera
+    rect.union_ip(pygame.draw.circle(window, BLACK, (x + 5, y + 5), 3))  # Rueda delantera
+
+    DARK_GRAY = (30, 30, 30)
+    # Fondo oscuro detrás de los residuos, centrado sobre el camión
+    background_width = 40
+    background_height = 15
+    waste_offset_x = x - background_width // 2
+    waste_offset_y = y - 20
+    background_rect = pygame.Rect(waste_offset_x, waste_offset_y, background_width, background_height)
+    rect.union_ip(pygame.draw.rect(window, DARK_GRAY, background_rect))
+    rect.union_ip(pygame.draw.rect(window, WHITE, background_rect, 1))  # Borde blanco para resaltar el fondo
+
+    # Residuos cargados, en filas de 4
+    offset_step = 10
+    for i, waste in enumerate(truck.collected_waste):
+        row, col = divmod(i, 4)
+        pos_x = waste_offset_x + 5 + col * offset_step
+        pos_y = waste_offset_y + 5 + row * offset_step
+        rect.union_ip(pygame.draw.circle(window, WASTE_COLORS[waste.waste_type], (pos_x, pos_y), 5))
+    return rect
+
+
+def draw_classifier(window, agent):
+    """Dibujar un clasificador como un robot, con el color de parpadeo si está activo"""
+    if agent.blink:
+        agent.update_blink(pygame.time.get_ticks())
+    color = agent.blink_color if agent.blink else agent.original_color
+    x, y = agent.x, agent.y
+    rect = pygame.draw.rect(window, color, (x - 10, y - 15, 20, 15))  # Cuerpo
+    rect.union_ip(pygame.draw.circle(window, color, (x, y - 20), 5))  # Cabeza
+    rect.union_ip(pygame.draw.line(window, color, (x - 5, y), (x - 10, y + 10), 2))  # Pierna izquierda
+    rect.union_ip(pygame.draw.line(window, color, (x + 5, y), (x + 10, y + 10), 2))  # Pierna derecha
+    rect.union_ip(pygame.draw.line(window, color, (x - 10, y - 10), (x - 15, y - 5), 2))  # Brazo izquierdo
+    rect.union_ip(pygame.draw.line(window, color, (x + 10, y - 10), (x + 15, y - 5), 2))  # Brazo derecho
+    return rect
+
+
+class PygameRenderer:
+    """Observador que dibuja el estado de la simulación en una ventana de Pygame.
+
+    El fondo, los residuos y los centros (cuerpo, techo y etiqueta) se dibujan
+    una sola vez en una superficie en caché, que solo se retoca localmente
+    cuando un residuo aparece o se recolecta. En cada fotograma se borran y
+    redibujan únicamente los rectángulos de los agentes y del texto, y solo
+    esos rectángulos se envían a `pygame.display.update`.
+    """
+    WASTE_BUCKET = 16  # Tamaño de cubeta para localizar residuos que se solapan
+
+    def __init__(self, fps=FPS):
+        pygame.init()
+        self.window = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Sistema Multiagente de Gestión de Residuos Urbanos")
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+        self.running = True
+        # Resolver las fuentes una sola vez al arrancar
+        TEXT_CACHE.font('Arial', 14)
+        TEXT_CACHE.font('Arial', 18)
+        self.background = None  # Fondo fijo sobre el que se dibuja la capa
+        self.layer = None  # Capa en caché: fondo, residuos sin recolectar y centros
+        self.center_rects = []  # (centro, rectángulo) para repintar los centros tapados
+        self.waste_rects = {}  # Residuo dibujado -> su rectángulo
+        self.waste_order = {}  # Residuo dibujado -> orden de dibujo (los posteriores encima)
+        self.waste_serial = 0
+        self.waste_buckets = {}  # Cubeta -> residuos dibujados en ella
+        self.sprite_rects = []  # Rectángulos dibujados en el fotograma anterior
+
+    def build_layer(self, environment):
+        """Dibujar una sola vez la capa en caché"""
+        # Fondo fijo: blanco y, si la hay, la red viaria
+        self.background = pygame.Surface((WIDTH, HEIGHT))
+        self.background.fill(WHITE)
+        if environment.road_network is not None:
+            draw_roads(self.background, environment.road_network)
+        self.layer = self.background.copy()
+        for point in environment.waste_points:
+            self.draw_waste(point)
+        # Los centros quedan por encima de los residuos, como en el dibujo completo
+        self.center_rects = [(center, draw_center(self.layer, center)) for center in environment.centers]
+        environment.waste_changes = []
+
+        self.window.blit(self.layer, (0, 0))
+        pygame.display.update()
+
+    def bucket_keys(self, rect):
+        size = self.WASTE_BUCKET
+        for bx in range(rect.left // size, rect.right // size + 1):
+            for by in range(rect.top // size, rect.bottom // size + 1):
+                yield (bx, by)
+
+    def draw_waste(self, point):
+        """Añadir un residuo a la capa; si toca un centro, este se repinta encima"""
+        rect = draw_waste(self.layer, point)
+        self.waste_rects[point] = rect
+        self.waste_order[point] = self.waste_serial
+        self.waste_serial += 1
+        for key in self.bucket_keys(rect):
+            self.waste_buckets.setdefault(key, set()).add(point)
+        if any(center_rect.colliderect(rect) for _, center_rect in self.center_rects):
+            self.repaint(rect)
+        return rect
+
+    def erase_waste(self, point):
+        """Quitar un residuo de la capa y repintar lo que tapaba"""
+        rect = self.waste_rects.pop(point)
+        del self.waste_order[point]
+        for key in self.bucket_keys(rect):
+            self.waste_buckets[key].discard(point)
+        self.repaint(rect)
+        return rect
+
+    def repaint(self, rect):
+        """Redibujar la capa recortada a `rect`: fondo, residuos en su orden y centros encima"""
+        neighbours = set()
+        for key in self.bucket_keys(rect):
+            neighbours.update(self.waste_buckets.get(key, ()))
+
+        layer = self.layer
+        layer.set_clip(rect)
+        layer.blit(self.background, rect, rect)
+        # Mismo orden de dibujo que al añadirlos: los posteriores quedan encima
+        for other in sorted(neighbours, key=self.waste_order.__getitem__):
+            if self.waste_rects[other].colliderect(rect):
+                draw_waste(layer, other)
+        for center, center_rect in self.center_rects:
+            if center_rect.colliderect(rect):
+                draw_center(layer, center)
+        layer.set_clip(None)
+
+    def update_waste_layer(self, environment):
+        """Aplicar a la capa de residuos los cambios desde el último fotograma"""
+        dirty = []
+        # Solo cuenta el último cambio de cada residuo: uno que aparece y se recolecta
+        # entre dos fotogramas no se llega a dibujar. Las banderas vienen con el cambio
+        # porque la fila de un residuo recolectado ya puede ser de otro.
+        latest = {}
+        for point, collected in environment.waste_changes:
+            latest[point] = collected
+        for point, collected in latest.items():
+            if collected:
+                if point in self.waste_rects:
+                    dirty.append(self.erase_waste(point))
+            elif point not in self.waste_rects:
+                dirty.append(self.draw_waste(point))
+        environment.waste_changes.clear()
+        return dirty
+
+    def close(self):
+        """Cerrar la ventana y liberar pygame"""
+        pygame.quit()
+
+    def __call__(self, simulation):
+        self.clock.tick(self.fps)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+
+        environment = simulation.environment
+        if self.layer is None:
+            self.build_layer(environment)
+        window = self.window
+
+        # Borrar los agentes del fotograma anterior con la capa en caché
+        dirty = self.update_waste_layer(environment)
+        previous = self.sprite_rects
+        for rect in previous + dirty:
+            window.blit(self.layer, rect, rect)
+
+        # Dibujar los elementos dinámicos y recordar dónde quedaron
+        sprites = []
+        for agent in simulation.collection_agents:
+            sprites.append(draw_collector(window, agent))
+        for transport_agent in simulation.transport_agents:
+            sprites.append(draw_truck(window, transport_agent))
+        for classification_agent in simulation.classification_agents:
+            sprites.append(draw_classifier(window, classification_agent))
+
+        # Mostrar el número de residuos en cada centro
+        for center in environment.centers:
+            text = f"Residuos: {center.received_count}"
+            text_surface = TEXT_CACHE.render('Arial', 18, text)
+            sprites.append(window.blit(text_surface, (center.x - 40, center.y + 30)))
+
+        self.sprite_rects = sprites
+        pygame.display.update(previous + dirty + sprites)
@@ -0,0 +1,478 @@
+"""Red viaria ponderada en arrays de adyacencia (CSR) con búsquedas ALT."""
+import csv
+import heapq
+import math
+import random
+import time
+
+import numpy as np
+
+from .pathfinding import PathCache
+
+# Nodos por bloque de cotas ALT calculadas de una vez (ver LowerBounds)
+BOUND_BLOCK = 1024
+
+
+def dijkstra(indptr, indices, weights, source, parents=False):
+    """Distancias desde `source` a todos los nodos sobre listas CSR (inf si no se alcanza).
+
+    Con `parents=True` devuelve también el predecesor de cada nodo en el
+    árbol de caminos mínimos (-1 en la raíz y en los nodos no alcanzados).
+    """
+    n = len(indptr) - 1
+    dist = [math.inf] * n
+    parent = [-1] * n if parents else None
+    dist[source] = 0.0
+    frontier = [(0.0, source)]
+    while frontier:
+        d, node = heapq.heappop(frontier)
+        if d > dist[node]:
+            continue  # Entrada obsoleta del montículo
+        for i in range(indptr[node], indptr[node + 1]):
+            next = indices[i]
+            new_dist = d + weights[i]
+            if new_dist < dist[next]:
+                dist[next] = new_dist
+                if parents:
+                    parent[next] = node
+                heapq.heappush(frontier, (new_dist, next))
+    return (dist, parent) if parents else dist
+
+
+class NodeIndex:
+    """Cubetas uniformes con los nodos (también en CSR) para ajustar posiciones al nodo más cercano"""
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.min_x = float(x.min())
+        self.min_y = float(y.min())
+        span = max(float(x.max()) - self.min_x, float(y.max()) - self.min_y, 1.0)
+        # Unos pocos nodos por cubeta
+        self.cell_size = max(span / max(math.sqrt(len(x)) / 2, 1.0), 1e-9)
+        self.cols = int((float(x.max()) - self.min_x) // self.cell_size) + 1
+        self.rows = int((float(y.max()) - self.min_y) // self.cell_size) + 1
+        bucket = self.bucket_ids(x, y)
+        self.order = np.argsort(bucket, kind='stable')
+        self.bucket_ptr = np.concatenate(([0], np.cumsum(np.bincount(bucket, minlength=self.cols * self.rows))))
+
+    def bucket_ids(self, x, y):
+        col = np.clip(((x - self.min_x) // self.cell_size).astype(np.int64), 0, self.cols - 1)
+        row = np.clip(((y - self.min_y) // self.cell_size).astype(np.int64), 0, self.rows - 1)
+        return row * self.cols + col
+
+    def nearest(self, x, y):
+        """Nodo más cercano (distancia euclídea) a una posición"""
+        col = min(max(int((x - self.min_x) // self.cell_size), 0), self.cols - 1)
+        row = min(max(int((y - self.min_y) // self.cell_size), 0), self.rows - 1)
+        best = -1
+        best_dist = math.inf
+        for radius in range(max(self.cols, self.rows)):
+            rows = range(max(row - radius, 0), min(row + radius, self.rows - 1) + 1)
+            buckets = []
+            for r in rows:
+                if abs(r - row) == radius:
+                    buckets.extend(r * self.cols + c for c in range(max(col - radius, 0), min(col + radius, self.cols - 1) + 1))
+                else:
+                    buckets.extend(r * self.cols + c for c in (col - radius, col + radius) if 0 <= c < self.cols)
+            nodes = [self.order[self.bucket_ptr[b]:self.bucket_ptr[b + 1]] for b in buckets]
+            if nodes:
+                nodes = np.concatenate(nodes)
+                if len(nodes):
+                    dist = np.hypot(self.x[nodes] - x, self.y[nodes] - y)
+                    i = int(np.argmin(dist))
+                    if dist[i] < best_dist:
+                        best, best_dist = int(nodes[i]), float(dist[i])
+            # Cualquier nodo de un anillo más lejano está al menos a radius * cell_size
+            if best >= 0 and best_dist <= radius * self.cell_size:
+                break
+        return best
+
+
+class LowerBounds:
+    """Cotas ALT hacia un destino fijo, calculadas por bloques de nodos a medida que A* las pide.
+
+    Una búsqueda corta solo paga los bloques de los nodos que llega a encolar,
+    no toda la red. Sin landmarks todas valen 0.
+    """
+    def __init__(self, network, target):
+        self.network = network
+        self.target = target
+        self.blocks = [None] * (-(-len(network) // BOUND_BLOCK))
+
+    def __getitem__(self, node):
+        index = node // BOUND_BLOCK
+        block = self.blocks[index]
+        if block is None:
+            start = index * BOUND_BLOCK
+            block = self.blocks[index] = self.network.block_bounds(self.target, start, start + BOUND_BLOCK)
+        return block[node - index * BOUND_BLOCK]
+
+
+class RoadNetwork:
+    """Grafo de calles con aristas ponderadas en arrays de adyacencia (CSR).
+
+    Las aristas que salen del nodo v son `indices[indptr[v]:indptr[v + 1]]`,
+    con pesos en la misma posición de `weights` (coste de recorrerlas, p. ej.
+    tiempo). Con `preprocess` se eligen landmarks y se precalculan sus
+    distancias para la cota ALT, que mantiene rápidas las consultas A* en
+    redes de cientos de miles de nodos.
+    """
+    def __init__(self, x, y, indptr, indices, weights, symmetric=False):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.symmetric = symmetric  # Cada arista tiene su inversa con el mismo peso
+        # Copias en listas para los bucles de búsqueda en Python
+        self.adjacency = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        self._reverse = self if symmetric else None
+        self._index = None
+        self.landmarks = []
+        self.landmark_from = None  # (k, n): distancia de cada landmark a cada nodo
+        self.landmark_to = None  # (k, n): distancia de cada nodo a cada landmark
+        self.expansions = 0  # Nodos expandidos por shortest_path
+
+    @classmethod
+    def from_edges(cls, x, y, source, target, weight=None, directed=False):
+        """Construir la red a partir de una lista de aristas; por defecto el peso es la longitud"""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        source = np.asarray(source, dtype=np.int64)
+        target = np.asarray(target, dtype=np.int64)
+        if weight is None:
+            weight = np.hypot(x[target] - x[source], y[target] - y[source])
+        weight = np.asarray(weight, dtype=np.float64)
+        if not directed:
+            source, target = np.concatenate((source, target)), np.concatenate((target, source))
+            weight = np.concatenate((weight, weight))
+        return cls(x, y, *cls.csr(len(x), source, target, weight), symmetric=not directed)
+
+    @staticmethod
+    def csr(n, source, target, weight):
+        """Ordenar aristas por origen y devolver (indptr, indices, weights)"""
+        order = np.argsort(source, kind='stable')
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(source, minlength=n))))
+        return indptr, target[order], weight[order]
+
+    @classmethod
+    def load(cls, path):
+        """Cargar una red guardada con `save` o un .npz con x, y, source, target[, weight, directed]"""
+        with np.load(path) as data:
+            if 'indptr' in data:
+                network = cls(data['x'], data['y'], data['indptr'], data['indices'], data['weights'],
+                              symmetric=bool(data['symmetric']))
+                if 'landmarks' in data:
+                    network.landmarks = data['landmarks'].tolist()
+                    network.landmark_from = data['landmark_from']
+                    network.landmark_to = network.landmark_from if network.symmetric else data['landmark_to']
+                return network
+            weight = data['weight'] if 'weight' in data else None
+            directed = bool(data['directed']) if 'directed' in data else False
+            return cls.from_edges(data['x'], data['y'], data['source'], data['target'], weight, directed)
+
+    @classmethod
+    def load_csv(cls, nodes_path, edges_path, directed=False):
+        """Cargar nodos (columnas x, y; el identificador es el número de fila) y aristas (source, target[, weight])"""
+        with open(nodes_path, newline='') as f:
+            nodes = list(csv.DictReader(f))
+        with open(edges_path, newline='') as f:
+            edges = list(csv.DictReader(f))
+        x = [float(node['x']) for node in nodes]
+        y = [float(node['y']) for node in nodes]
+        source = [int(edge['source']) for edge in edges]
+        target = [int(edge['target']) for edge in edges]
+        weight = [float(edge['weight']) for edge in edges] if edges and 'weight' in edges[0] else None
+        return cls.from_edges(x, y, source, target, weight, directed)
+
+    def save(self, path):
+        """Guardar la red en CSR, con los landmarks si ya se preprocesó"""
+        arrays = dict(x=self.x, y=self.y, indptr=self.indptr, indices=self.indices, weights=self.weights,
+                      symmetric=self.symmetric)
+        if self.landmarks:
+            arrays.update(landmarks=np.array(self.landmarks), landmark_from=self.landmark_from)
+            if not self.symmetric:
+                arrays['landmark_to'] = self.landmark_to
+        np.savez(path, **arrays)
+
+    @classmethod
+    def lattice(cls, width, height, spacing, avenue_every=5, avenue_speed=2.0, drop=0.0, seed=None):
+        """Red de calles en cuadrícula: cada `avenue_every` calles hay una avenida más rápida.
+
+        `drop` es la fracción de tramos que se eliminan al azar para que la
+        red no sea regular. El peso de cada tramo es su longitud entre la
+        velocidad de la calle.
+        """
+        rng = random.Random(seed)
+        cols = int(width // spacing) + 1
+        rows = int(height // spacing) + 1
+        ids = np.arange(cols * rows).reshape(rows, cols)
+        x = np.tile(np.arange(cols) * spacing, rows).astype(np.float64)
+        y = np.repeat(np.arange(rows) * spacing, cols).astype(np.float64)
+        row_speed = np.where(np.arange(rows) % avenue_every == 0, avenue_speed, 1.0)
+        col_speed = np.where(np.arange(cols) % avenue_every == 0, avenue_speed, 1.0)
+        source = np.concatenate((ids[:, :-1].ravel(), ids[:-1, :].ravel()))
+        target = np.concatenate((ids[:, 1:].ravel(), ids[1:, :].ravel()))
+        speed = np.concatenate((np.repeat(row_speed, cols - 1), np.tile(col_speed, rows - 1)))
+        if drop:
+            keep = np.array([rng.random() >= drop for _ in range(len(source))])
+            source, target, speed = source[keep], target[keep], speed[keep]
+        return cls.from_edges(x, y, source, target, spacing / speed).main_component()
+
+    def subnetwork(self, nodes):
+        """Red inducida por un subconjunto de nodos, renumerados en orden"""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        new_id = np.full(len(self), -1, dtype=np.int64)
+        new_id[nodes] = np.arange(len(nodes))
+        source = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        keep = (new_id[source] >= 0) & (new_id[self.indices] >= 0)
+        indptr, indices, weights = self.csr(len(nodes), new_id[source[keep]], new_id[self.indices[keep]],
+                                            self.weights[keep])
+        return RoadNetwork(self.x[nodes], self.y[nodes], indptr, indices, weights, symmetric=self.symmetric)
+
+    def main_component(self):
+        """Componente en la que todos los nodos se alcanzan entre sí, partiendo del nodo de mayor grado.
+
+        Las redes reales traen islas (tramos sueltos, accesos privados);
+        fuera de esta componente habría residuos inalcanzables.
+        """
+        root = int(np.argmax(np.diff(self.indptr)))
+        reach = np.isfinite(dijkstra(*self.adjacency, root))
+        if not self.symmetric:
+            reach &= np.isfinite(dijkstra(*self.reverse().adjacency, root))
+        if reach.all():
+            return self
+        return self.subnetwork(np.flatnonzero(reach))
+
+    def fit(self, width, height, margin=50):
+        """Copia con las coordenadas escaladas al rectángulo del mapa (los pesos no cambian)"""
+        span_x = max(float(self.x.max() - self.x.min()), 1e-9)
+        span_y = max(float(self.y.max() - self.y.min()), 1e-9)
+        scale = min((width - 2 * margin) / span_x, (height - 2 * margin) / span_y)
+        network = RoadNetwork(margin + (self.x - self.x.min()) * scale, margin + (self.y - self.y.min()) * scale,
+                              self.indptr, self.indices, self.weights, symmetric=self.symmetric)
+        network.landmarks = self.landmarks
+        network.landmark_from = self.landmark_from
+        network.landmark_to = self.landmark_to
+        return network
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def reverse(self):
+        """Red con las aristas invertidas (la misma si es simétrica)"""
+        if self._reverse is None:
+            n = len(self)
+            source = np.repeat(np.arange(n), np.diff(self.indptr))
+            indptr, indices, weights = self.csr(n, self.indices.astype(np.int64), source, self.weights)
+            self._reverse = RoadNetwork(self.x, self.y, indptr, indices, weights)
+            self._reverse._reverse = self
+        return self._reverse
+
+    def nearest_node(self, x, y):
+        """Nodo más cercano a una posición"""
+        if self._index is None:
+            self._index = NodeIndex(self.x, self.y)
+        return self._index.nearest(x, y)
+
+    def position(self, node):
+        return (float(self.x[node]), float(self.y[node]))
+
+    def snap(self, pos):
+        """Coordenadas del nodo más cercano a una posición"""
+        return self.position(self.nearest_node(*pos))
+
+    def preprocess(self, num_landmarks=8, seed=0):
+        """Elegir landmarks por máxima separación y precalcular sus distancias (ALT)"""
+        n = len(self)
+        rng = random.Random(seed)
+        forward = self.adjacency
+        backward = self.reverse().adjacency
+        landmarks, rows_from, rows_to = [], [], []
+        # Primer landmark: el nodo más lejano de uno al azar
+        start = np.array(dijkstra(*forward, rng.randrange(n)))
+        candidate = int(np.argmax(np.where(np.isfinite(start), start, -1)))
+        separation = np.full(n, np.inf)
+        for _ in range(min(num_landmarks, n)):
+            landmarks.append(candidate)
+            from_landmark = np.array(dijkstra(*forward, candidate))
+            rows_from.append(from_landmark)
+            if not self.symmetric:
+                rows_to.append(np.array(dijkstra(*backward, candidate)))
+            # Siguiente: el nodo alcanzable más alejado de todos los elegidos
+            separation = np.minimum(separation, np.where(np.isfinite(from_landmark), from_landmark, np.inf))
+            spread = np.where(np.isfinite(separation), separation, -1)
+            spread[landmarks] = -1
+            candidate = int(np.argmax(spread))
+            if spread[candidate] <= 0:
+                break
+        self.landmarks = landmarks
+        self.landmark_from = np.array(rows_from)
+        self.landmark_to = self.landmark_from if self.symmetric else np.array(rows_to)
+
+    def lower_bounds(self, target):
+        """Cotas inferiores ALT de cada nodo a `target`, calculadas solo al consultarlas"""
+        return LowerBounds(self, target)
+
+    def block_bounds(self, target, start, stop):
+        """Cota inferior ALT a `target` de los nodos start..stop-1 (ceros sin landmarks)"""
+        if not self.landmarks:
+            return [0.0] * (min(stop, len(self)) - start)
+        with np.errstate(invalid='ignore'):
+            # d(v, t) >= d(L, t) - d(L, v)  y  d(v, t) >= d(v, L) - d(t, L)
+            bounds = np.maximum(
+                (self.landmark_from[:, target, None] - self.landmark_from[:, start:stop]).max(axis=0),
+                (self.landmark_to[:, start:stop] - self.landmark_to[:, target, None]).max(axis=0),
+            )
+        return np.where(np.isnan(bounds), 0.0, np.maximum(bounds, 0.0)).tolist()
+
+    def lower_bound(self, source, target):
+        """Cota inferior ALT entre dos nodos"""
+        if not self.landmarks:
+            return 0.0
+        with np.errstate(invalid='ignore'):
+            bound = max(np.max(self.landmark_from[:, target] - self.landmark_from[:, source]),
+                        np.max(self.landmark_to[:, source] - self.landmark_to[:, target]), 0.0)
+        return 0.0 if math.isnan(bound) else float(bound)
+
+    def shortest_path(self, source, target):
+        """Camino mínimo (nodos tras `source` hasta `target`) y su coste, con A* y cota ALT.
+
+        Devuelve (None, inf) si `target` no es alcanzable.
+        """
+        if source == target:
+            return [], 0.0
+        indptr, indices, weights = self.adjacency
+        bounds = self.lower_bounds(target)
+        g = {source: 0.0}
+        came_from = {source: -1}
+        frontier = [(bounds[source], 0.0, source)]
+        while frontier:
+            _, cost, node = heapq.heappop(frontier)
+            if node == target:
+                break
+            if cost > g[node]:
+                continue  # Entrada obsoleta
+            self.expansions += 1
+            for i in range(indptr[node], indptr[node + 1]):
+                next = indices[i]
+                new_cost = cost + weights[i]
+                if new_cost < g.get(next, math.inf):
+                    g[next] = new_cost
+                    came_from[next] = node
+                    heapq.heappush(frontier, (new_cost + bounds[next], new_cost, next))
+        else:
+            return None, math.inf
+        path = []
+        node = target
+        while node != source:
+            path.append(node)
+            node = came_from[node]
+        path.reverse()
+        return path, g[target]
+
+
+class RoadField:
+    """Árbol de caminos mínimos de todos los nodos hacia un destino fijo (Dijkstra inverso)"""
+    def __init__(self, network, goal):
+        self.goal = goal
+        self.dist, self.next = dijkstra(*network.reverse().adjacency, goal, parents=True)
+
+    def distance(self, node):
+        return self.dist[node]
+
+    def path_from(self, node):
+        """Nodos desde el siguiente a `node` hasta el destino (vacía si no se alcanza)"""
+        if self.dist[node] == math.inf:
+            return []
+        path = []
+        next = self.next
+        while node != self.goal:
+            node = next[node]
+            path.append(node)
+        return path
+
+
+class RoadPathfinder:
+    """Servicio de rutas sobre una red viaria, con la misma interfaz que `Pathfinder`.
+
+    Las posiciones se ajustan al nodo más cercano; los destinos fijos usan un
+    árbol de caminos mínimos precalculado y el resto A* con cota ALT y caché.
+    La red no admite cierres: `repair_path` vuelve a buscar la ruta.
+    """
+    def __init__(self, network, cache_size=1024):
+        self.network = network
+        self.cache = PathCache(cache_size)
+        self.fields = {}  # Nodo destino -> RoadField
+        self.queries = 0
+        self.repairs = 0
+        self.expansions = 0  # Nodos expandidos por A* con cota ALT
+        self.waypoints = 0  # Waypoints devueltos en total (longitud acumulada de las rutas)
+        self.search_time = 0.0
+
+    def node_of(self, pos):
+        return self.network.nearest_node(pos[0], pos[1])
+
+    def snap(self, pos):
+        """Posición del nodo de la red más cercano"""
+        return self.network.snap(pos)
+
+    def add_destination(self, goal):
+        node = self.node_of(goal)
+        if node not in self.fields:
+            self.fields[node] = RoadField(self.network, node)
+        return self.fields[node]
+
+    def travel_cost(self, start, goal):
+        """Coste de viaje: exacto si el destino tiene árbol precalculado, cota ALT si no"""
+        start_node = self.node_of(start)
+        goal_node = self.node_of(goal)
+        field = self.fields.get(goal_node)
+        if field is not None:
+            return field.distance(start_node)
+        return self.network.lower_bound(start_node, goal_node)
+
+    def find_path(self, start, goal, key=None):
+        """Ruta de waypoints (posiciones de nodos) entre dos posiciones"""
+        started = time.perf_counter()
+        self.queries += 1
+        try:
+            path = self._find_path(start, goal)
+            self.waypoints += len(path)
+            return path
+        finally:
+            self.search_time += time.perf_counter() - started
+
+    def repair_path(self, key, start, goal):
+        self.repairs += 1
+        path = self.find_path(start, goal, key)
+        return path if path or self.node_of(start) == self.node_of(goal) else None
+
+    def _find_path(self, start, goal):
+        network = self.network
+        start_node = self.node_of(start)
+        goal_node = self.node_of(goal)
+        field = self.fields.get(goal_node)
+        if field is not None:
+            nodes = field.path_from(start_node)
+        else:
+            key = (start_node, goal_node)
+            nodes = self.cache.get(key)
+            if nodes is None:
+                before = network.expansions
+                nodes, _ = network.shortest_path(start_node, goal_node)
+                self.expansions += network.expansions - before
+                nodes = tuple(nodes or ())
+                self.cache.put(key, nodes)
+        if not nodes and start_node != goal_node:
+            return []
+        path = [network.position(node) for node in nodes]
+        # Desde fuera de la red, entrar primero por el nodo más cercano
+        origin = network.position(start_node)
+        if (float(start[0]), float(start[1])) != origin:
+            path.insert(0, origin)
+        return path
@@ -0,0 +1,62 @@
+"""Planificación del orden de visita de paradas (recorridos de camión)."""
+import itertools
+
+# Hasta este número de paradas se prueban todas las permutaciones
+EXACT_LIMIT = 7
+
+
+def tour_cost(start, order, end, cost):
+    """Coste de ir de `start` a `end` pasando por las paradas en `order`"""
+    total = 0
+    current = start
+    for stop in order:
+        total += cost(current, stop)
+        current = stop
+    if end is not None:
+        total += cost(current, end)
+    return total
+
+
+def nearest_neighbor(start, stops, cost):
+    """Recorrido voraz: siempre a la parada pendiente más barata"""
+    pending = list(stops)
+    order = []
+    current = start
+    while pending:
+        next_stop = min(pending, key=lambda stop: cost(current, stop))
+        pending.remove(next_stop)
+        order.append(next_stop)
+        current = next_stop
+    return order
+
+
+def two_opt(start, order, end, cost):
+    """Mejorar un recorrido invirtiendo tramos mientras baje el coste"""
+    order = list(order)
+    best = tour_cost(start, order, end, cost)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                candidate_cost = tour_cost(start, candidate, end, cost)
+                if candidate_cost < best:
+                    order, best = candidate, candidate_cost
+                    improved = True
+    return order
+
+
+def plan_route(start, stops, end, cost, exact_limit=EXACT_LIMIT):
+    """Orden de visita de `stops` que minimiza el coste de `start` a `end`.
+
+    `cost(a, b)` es el coste de viajar entre dos ubicaciones (las paradas y
+    los extremos). Con pocas paradas la solución es exacta; con muchas se
+    usa vecino más cercano seguido de 2-opt.
+    """
+    stops = list(stops)
+    if len(stops) <= 1:
+        return stops
+    if len(stops) <= exact_limit:
+        return list(min(itertools.permutations(stops), key=lambda order: tour_cost(start, order, end, cost)))
+    return two_opt(start, nearest_neighbor(start, stops, cost), end, cost)
@@ -0,0 +1,201 @@
+"""Motor de eventos discretos: cada tick solo se procesan los agentes con algo que hacer."""
+import heapq
+
+from .agents import MOVING_STATES
+
+# Estados en los que el agente sondea el mundo (residuos libres, camiones) hasta que algo cambie
+POLLING_STATES = frozenset({'idle', 'waiting_for_truck', 'waiting'})
+# Fases de un tick: primero los recolectores y después los camiones, como en `Simulation.run_tick`
+COLLECTORS, TRUCKS = 0, 1
+
+
+class EventScheduler:
+    """Avance por eventos con el mismo resultado que `Simulation.step` tick a tick.
+
+    Un montículo guarda el tick en que cada agente vuelve a tener algo que
+    hacer: el de llegada al final de su ruta (calculado con la longitud de
+    los tramos y la velocidad) o el siguiente si está recogiendo o
+    entregando. Los agentes que sondean (libres, esperando camión, camiones
+    en su base) solo se evalúan cuando ha cambiado algo en el entorno
+    (`CityEnvironment.revision`). Los ticks sin nada que hacer se saltan de
+    golpe: solo se mueven los agentes con `AgentStore.advance(ticks=k)`.
+
+    Se engancha con `simulation.scheduler = EventScheduler()`. Los
+    observadores se siguen llamando en sus ticks, así que con el dibujo
+    activo apenas se salta nada; la ganancia está en las ejecuciones sin
+    pantalla.
+    """
+    def __init__(self):
+        self.events = []  # Montículo de (tick, fase, posición, secuencia, agente)
+        self.wake = {}  # Agente -> tick de su evento vigente (las entradas viejas se descartan al salir)
+        self.pollers = (set(), set())  # Agentes que sondean, por fase
+        self.seen_revision = None  # Revisión con la que todos los que sondean están al día
+        self.sequence = 0
+        self.positions = {}  # Agente -> (fase, posición en su lista)
+        # Métricas
+        self.activations = 0  # Agentes procesados
+        self.busy_ticks = 0  # Ticks con algo que hacer
+        self.skipped_ticks = 0  # Ticks saltados moviendo solo a los agentes
+
+    def step(self, simulation, n=1, until=None):
+        """Avanzar `n` ticks como `Simulation.step`, saltando los ticks sin eventos"""
+        end = simulation.tick + n
+        self.rebuild(simulation)
+        while simulation.tick < end:
+            tick = simulation.tick
+            due = self.next_tick(simulation, end)
+            if due > tick:
+                self.skip(simulation, due - tick)
+                continue
+            self.run_tick(simulation)
+            if until is not None and until(simulation):
+                break
+        return simulation.tick
+
+    def rebuild(self, simulation):
+        """Calcular de cero los eventos de todos los agentes (p. ej. tras cierres o al restaurar)"""
+        self.events = []
+        self.wake = {}
+        self.pollers = (set(), set())
+        self.seen_revision = None
+        self.positions = {}
+        tick = simulation.tick
+        for phase, agents in ((COLLECTORS, simulation.collection_agents), (TRUCKS, simulation.transport_agents)):
+            for position, agent in enumerate(agents):
+                self.positions[agent] = (phase, position)
+                self.schedule(agent, tick, tick)
+
+    def schedule(self, agent, tick, earliest):
+        """Programar el próximo evento de un agente tras procesarlo (o al reconstruir) en `tick`"""
+        phase, position = self.positions[agent]
+        state = agent.state
+        self.pollers[phase].discard(agent)
+        if state in POLLING_STATES:
+            self.wake.pop(agent, None)
+            self.pollers[phase].add(agent)
+            return
+        if state in MOVING_STATES:
+            if agent.stalled:
+                # Solo un cambio del mapa (fuera de `step`) lo pone otra vez en marcha
+                self.wake.pop(agent, None)
+                return
+            due = max(earliest, tick + agent.environment.agent_store.ticks_to_arrive(agent.slot))
+        else:
+            due = earliest  # Cualquier otro estado actúa en el tick siguiente sin esperar a nada
+        if self.wake.get(agent) == due:
+            return
+        self.wake[agent] = due
+        self.sequence += 1
+        heapq.heappush(self.events, (due, phase, position, self.sequence, agent))
+
+    def next_tick(self, simulation, end):
+        """Primer tick desde el actual con algo que hacer, acotado por `end` y los observadores"""
+        tick = simulation.tick
+        environment = simulation.environment
+        if environment.revision != self.seen_revision:
+            return tick
+        if self.assigning(simulation):
+            return tick
+        if any(agent.received_waste for agent in simulation.classification_agents):
+            # Con cola los clasificadores trabajan en cada tick
+            return tick
+        due = end
+        events = self.events
+        while events and self.wake.get(events[0][4]) != events[0][0]:
+            heapq.heappop(events)
+        if events:
+            due = min(due, events[0][0])
+        arrivals = simulation.arrivals
+        if arrivals is not None and due > tick:
+            next_arrival = getattr(arrivals, 'next_arrival', None)
+            if next_arrival is None:
+                return tick
+            arrival = next_arrival(tick, due)
+            if arrival is not None:
+                due = arrival
+        for _, every in simulation.observers:
+            # Parar en el tick en que toca llamar al observador
+            due = min(due, (tick // every + 1) * every)
+        return due
+
+    def assigning(self, simulation):
+        """Indica si el reparto en lote tiene trabajo: recolectores libres y residuos o recolectores en camino"""
+        if simulation.assigner is None or not any(agent.state == 'idle' for agent in self.pollers[COLLECTORS]):
+            return False
+        return bool(len(simulation.environment.waste_index)) or any(
+            agent.state == 'moving_to_waste' for agent in simulation.collection_agents)
+
+    def skip(self, simulation, ticks):
+        """Saltar `ticks` ticks sin eventos: solo se desplazan los agentes"""
+        simulation.move_agents(ticks)
+        self.skipped_ticks += ticks
+        simulation.tick += ticks - 1
+        simulation.finish_tick()
+
+    def run_tick(self, simulation):
+        """Procesar un tick con eventos con las fases de `Simulation.run_tick`.
+
+        Solo cambian la percepción y decisión de recolectores y camiones, que
+        se limitan a los agentes con evento o que sondean.
+        """
+        environment = simulation.environment
+        tick = simulation.tick
+        self.busy_ticks += 1
+        simulation.spawn_arrivals()
+        if self.assigning(simulation):
+            revision = environment.revision
+            simulation.assign_idle()
+            if environment.revision != revision:
+                # El reparto en lote puede cambiar el objetivo de recolectores en camino
+                for agent in simulation.collection_agents:
+                    self.schedule(agent, tick, tick)
+
+        start_revision = environment.revision
+        stale = start_revision != self.seen_revision
+        self.run_phase(simulation, COLLECTORS, simulation.collection_agents, tick, stale)
+        stale = stale or environment.revision != start_revision
+        self.run_phase(simulation, TRUCKS, simulation.transport_agents, tick, stale)
+
+        simulation.move_agents()
+        simulation.classify()
+        if environment.revision == start_revision:
+            self.seen_revision = start_revision
+        simulation.finish_tick()
+
+    def run_phase(self, simulation, phase, agents, tick, stale):
+        """Procesar por orden de lista los agentes de una fase con evento en este tick"""
+        environment = simulation.environment
+        events = self.events
+        wake = self.wake
+        pollers = self.pollers[phase]
+        queue = []
+        while events and events[0][0] == tick and events[0][1] <= phase:
+            entry = heapq.heappop(events)
+            if wake.get(entry[4]) == tick:
+                queue.append(entry[2])
+        if stale:
+            queue.extend(self.positions[agent][1] for agent in pollers)
+        queued = set(queue)
+        queue = list(queued)
+        heapq.heapify(queue)
+        while queue:
+            position = heapq.heappop(queue)
+            agent = agents[position]
+            wake.pop(agent, None)
+            revision = environment.revision
+            agent.perceive()
+            if phase == COLLECTORS:
+                agent.decide()
+            self.activations += 1
+            self.schedule(agent, tick, tick + 1)
+            if environment.revision != revision:
+                # Los que sondean y van detrás en la lista ven el cambio en este mismo tick
+                for poller in pollers:
+                    later = self.positions[poller][1]
+                    if later > position and later not in queued:
+                        queued.add(later)
+                        heapq.heappush(queue, later)
+                if phase == COLLECTORS:
+                    # Un recolector puede cargar un camión y ponerlo en marcha
+                    for truck in simulation.transport_agents:
+                        self.schedule(truck, tick, tick)
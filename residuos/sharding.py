@@ -0,0 +1,714 @@
+"""Simulación repartida en franjas del mapa entre varios procesos con memoria compartida.
+
+Cada franja vertical (shard) la lleva un proceso con sus residuos, sus
+recolectores y su propio buscador de rutas. El proceso coordinador da de
+alta los residuos y se queda con los camiones, la estación central y la
+clasificación. Cada tick es una barrera: el coordinador manda a cada shard
+el estado de los camiones y lo nuevo (residuos, recolectores que llegan,
+entregas rechazadas); los shards mueven a sus recolectores en paralelo y
+devuelven las reservas y entregas a los camiones, que el coordinador aplica
+por orden de recolector antes de mover la flota.
+"""
+import math
+import multiprocessing
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .agents import CollectionAgent, TransportAgent
+from .config import HEIGHT, WIDTH
+from .model import CentralStation, CityEnvironment, WastePoint
+from .simulation import Simulation, check_classification, truck_homes
+from .spatial import WasteIndex
+from .store import WasteStore
+
+# Anchura (píxeles) de la banda junto a cada frontera que un shard ve de sus vecinos
+MARGIN = 40
+# Estados de los recolectores, por código, en la columna compartida
+COLLECTOR_STATES = ('idle', 'moving_to_waste', 'collecting', 'moving_to_truck', 'delivering', 'waiting_for_truck')
+COLLECTOR_STATE_CODES = {state: code for code, state in enumerate(COLLECTOR_STATES)}
+# Columnas compartidas con lo que el coordinador necesita de cada recolector
+COLLECTOR_COLUMNS = {
+    'x': np.float64,
+    'y': np.float64,
+    'state': np.uint8,
+    'load': np.int32,  # Residuos que lleva encima
+    'deliveries': np.int64,
+    'travelled': np.float64,
+}
+
+
+# Contadores de búsqueda de rutas que se suman entre coordinador y shards
+PATH_COUNTERS = ('queries', 'expansions', 'waypoints', 'search_time', 'cache_hits', 'cache_misses', 'repairs')
+
+
+def path_counters(pathfinder):
+    """Contadores acumulados de un buscador de rutas, en el orden de PATH_COUNTERS"""
+    return (pathfinder.queries, pathfinder.expansions, pathfinder.waypoints, pathfinder.search_time,
+            pathfinder.cache.hits, pathfinder.cache.misses, pathfinder.repairs)
+
+
+class SharedBlock:
+    """Columnas NumPy de longitud fija en un bloque de memoria compartida entre procesos"""
+    def __init__(self, columns, length, name=None):
+        self.columns = columns  # nombre -> dtype
+        self.length = length
+        offsets = {}
+        size = 0
+        for column, dtype in columns.items():
+            size = -(-size // 8) * 8  # Cada columna alineada a 8 bytes
+            offsets[column] = size
+            size += np.dtype(dtype).itemsize * length
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=max(size, 1))
+        self.arrays = {column: np.ndarray(length, dtype=dtype, buffer=self.memory.buf, offset=offsets[column])
+                       for column, dtype in columns.items()}
+
+    def spec(self):
+        """Argumentos para abrir el mismo bloque desde otro proceso"""
+        return (self.columns, self.length, self.memory.name)
+
+    def close(self, unlink=False):
+        """Soltar las vistas y cerrar el bloque (y borrarlo, desde el proceso que lo creó)"""
+        self.arrays = {}
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+class SharedWasteStore(WasteStore):
+    """WasteStore sobre un bloque compartido.
+
+    Solo el coordinador da de alta filas (entre ticks, con los shards
+    parados); si el bloque se llena lo cambia por otro del doble de filas,
+    que los shards abren en la siguiente barrera. Cada shard escribe las
+    banderas de sus residuos y anota en `released` las filas que libera
+    para devolverlas en la barrera.
+    """
+    def __init__(self, block):
+        self.size = 0
+        self.free_slots = []
+        self.released = []
+        self.attach(block)
+
+    def attach(self, block):
+        """Pasar a usar las columnas de otro bloque"""
+        self.block = block
+        for name in self.columns:
+            setattr(self, name, block.arrays[name])
+
+    def _grow(self):
+        """Copiar las filas a un bloque nuevo del doble de tamaño y borrar el anterior (solo el coordinador)"""
+        old = self.block
+        try:
+            block = SharedBlock(self.columns, old.length * 2)
+        except OSError as exc:
+            raise MemoryError(f"No se puede ampliar la memoria compartida de residuos a {old.length * 2} filas "
+                              f"({exc}); reserve más desde el principio con waste_capacity") from exc
+        for name in self.columns:
+            block.arrays[name][:self.size] = old.arrays[name][:self.size]
+        self.attach(block)
+        # Los shards siguen con el anterior abierto hasta la barrera; el nombre ya no hace falta
+        old.close(unlink=True)
+
+    def free(self, index):
+        self.released.append(index)
+
+    def detach(self):
+        """Copiar las columnas fuera del bloque compartido para poder cerrarlo"""
+        for name in self.columns:
+            setattr(self, name, np.array(getattr(self, name)))
+
+
+class ShardLayout:
+    """Franjas verticales de igual anchura; el shard de un punto depende solo de su x"""
+    def __init__(self, shards, width=WIDTH):
+        self.shards = shards
+        self.width = width
+
+    def shard_of(self, x):
+        return min(max(int(x * self.shards // self.width), 0), self.shards - 1)
+
+    def bounds(self, shard):
+        return (shard * self.width / self.shards, (shard + 1) * self.width / self.shards)
+
+    def ghost_shards(self, x, margin):
+        """Shards vecinos para los que un punto cae en la banda de `margin` junto a su frontera"""
+        shard = self.shard_of(x)
+        left, right = self.bounds(shard)
+        neighbours = []
+        if shard > 0 and x - left < margin:
+            neighbours.append(shard - 1)
+        if shard < self.shards - 1 and right - x <= margin:
+            neighbours.append(shard + 1)
+        return neighbours
+
+
+class TruckReplica:
+    """Copia de un camión en un shard, puesta al día en cada barrera.
+
+    Ofrece a los recolectores lo mismo que el camión (base, estado, capacidad
+    libre y `receive_waste`); las reservas y entregas se anotan en la
+    estación del shard y el coordinador las aplica al camión real.
+    """
+    free_capacity = TransportAgent.free_capacity
+
+    def __init__(self, index, home, capacity, station):
+        self.index = index
+        self.home = home
+        self.capacity = capacity
+        self.station = station
+        self.state = 'waiting'
+        self.current_load = 0
+        self.reserved_load = 0
+
+    def request_departure(self):
+        self.station.record('depart', self, None)
+
+    def receive_waste(self, waste):
+        """Aceptar la entrega si cabe según la copia; el coordinador puede rechazarla en la barrera"""
+        total_items = self.current_load + len(waste)
+        if total_items > self.capacity:
+            return False
+        self.current_load = total_items
+        if total_items == self.capacity:
+            # El camión real sale hacia los centros en cuanto se llena
+            self.state = 'moving_to_center'
+        self.station.record('deliver', self, [(w.x, w.y, w.waste_type, w.weight) for w in waste])
+        self.station.delivered[self.station.collector] = list(waste)
+        return True
+
+
+class ShardStation(CentralStation):
+    """Estación central de un shard: despacha sobre las copias de los camiones y anota cada operación"""
+    def __init__(self):
+        super().__init__(classification_agents=[])
+        self.requests = []  # (recolector, secuencia, operación, camión, dato)
+        self.delivered = {}  # Recolector -> residuos entregados en este tick, por si se rechazan
+        self.collector = None  # Recolector (índice global) que se está procesando
+
+    def assign_truck(self, collector):
+        truck = super().assign_truck(collector)
+        if truck is not None:
+            self.record('reserve', truck, len(collector.collected_waste))
+        return truck
+
+    def release_truck(self, truck, load):
+        super().release_truck(truck, load)
+        self.record('release', truck, load)
+
+    def record(self, kind, truck, payload):
+        self.requests.append((self.collector, len(self.requests), kind, truck.index, payload))
+
+
+class ShardEnvironment(CityEnvironment):
+    """Entorno de un shard: anota qué residuos propios de la banda de un vecino dejan de estar disponibles.
+
+    El vecino no lee esas banderas del bloque compartido mientras este shard
+    las escribe: recibe las filas en la siguiente barrera.
+    """
+    def __init__(self, layout, margin, grid_size=20):
+        super().__init__(num_points=0, grid_size=grid_size)
+        self.layout = layout
+        self.margin = margin
+        self.taken = []  # (shard vecino, fila) reservados o recogidos en este tick
+
+    def reserve_waste(self, point):
+        super().reserve_waste(point)
+        self.hide_ghost(point)
+
+    def collect_waste(self, point):
+        reserved = point.reserved  # Si estaba reservado, el vecino ya lo sabe
+        super().collect_waste(point)
+        if not reserved:
+            self.hide_ghost(point)
+
+    def hide_ghost(self, point):
+        for shard in self.layout.ghost_shards(point.x, self.margin):
+            self.taken.append((shard, point.index))
+
+
+class ShardWorker:
+    """Una franja del mapa: sus residuos, sus recolectores y la banda visible de los vecinos.
+
+    Los recolectores pertenecen al shard cuyos residuos recogen, que puede no
+    ser el de su posición mientras van y vuelven del camión. Al quedar libre
+    un recolector pasa a otro shard (traspaso en la barrera) si está en la
+    franja de ese shard, si el residuo disponible más cercano está en la
+    banda de un vecino o, si en el suyo no queda ninguno, al shard con
+    residuos más próximo. Un recolector recién traspasado elige primero en
+    su nuevo shard.
+    """
+    def __init__(self, config):
+        self.index = config['index']
+        self.layout = ShardLayout(config['shards'])
+        self.margin = config['margin']
+        self.collector_block = SharedBlock(*config['collectors'])
+        environment = ShardEnvironment(self.layout, self.margin, grid_size=config['grid_size'])
+        environment.waste_store = SharedWasteStore(SharedBlock(*config['waste']))
+        environment.waste_index = WasteIndex(WIDTH, HEIGHT, cell_size=config['cell_size'])
+        station = ShardStation()
+        for index, (home, capacity) in enumerate(config['trucks']):
+            station.register_transport_agent(TruckReplica(index, tuple(home), capacity, station))
+            environment.pathfinder.add_destination(tuple(home))
+        environment.central_station = station
+        self.environment = environment
+        self.station = station
+        # Residuos de los vecinos junto a la frontera, tal como estaban en la última barrera;
+        # nunca se reservan desde aquí
+        self.ghosts = WasteIndex(WIDTH, HEIGHT, cell_size=config['cell_size'])
+        self.ghost_points = {}  # Fila -> residuo de la banda
+        self.collectors = {}  # Índice global -> recolector, en orden de índice
+        self.fresh = set()  # Recién traspasados: eligen en este shard antes de mirar a los vecinos
+
+    def step(self, message):
+        """Un tick del shard entre dos barreras; devuelve lo que el coordinador tiene que aplicar"""
+        started = time.process_time()
+        environment = self.environment
+        station = self.station
+        environment.tick = message['tick']
+        store = environment.waste_store
+        if message['waste'] is not None:
+            # El coordinador ha ampliado el bloque de residuos
+            old = store.block
+            store.attach(SharedBlock(*message['waste']))
+            old.close()
+        for truck, (state, load, reserved) in zip(station.transport_agents, message['trucks']):
+            truck.state, truck.current_load, truck.reserved_load = state, load, reserved
+        for row in message['spawn']:
+            environment.spawn_waste(WastePoint(store, row))
+        # Primero las bajas: una fila recogida puede volver ya como residuo nuevo
+        for row in message['taken']:
+            point = self.ghost_points.pop(row, None)
+            if point is not None:
+                self.ghosts.remove(point)
+        for row in message['ghosts']:
+            point = self.ghost_points[row] = WastePoint(store, row)
+            self.ghosts.add(point)
+        for record in message['arrive']:
+            self.adopt(record)
+        if message['arrive']:
+            self.collectors = dict(sorted(self.collectors.items()))
+        for gid in message['rejected']:
+            # El camión ya estaba lleno: recuperar la carga y pedir otro, como en `decide`
+            agent = self.collectors[gid]
+            station.collector = gid
+            agent.collected_waste = station.delivered[gid]
+            agent.deliveries -= 1
+            agent.request_truck()
+        station.delivered = {}
+
+        budget = list(message['available'])  # Traspasos admitidos por shard en este tick
+        leaving = []
+        for gid, agent in list(self.collectors.items()):
+            station.collector = gid
+            if agent.state == 'idle':
+                target, nearest = self.handoff(gid, agent, budget)
+                if target is not None:
+                    budget[target] -= 1
+                    leaving.append((self.release(gid), target))
+                    continue
+                # Lo mismo que `decide` con un recolector libre, sin repetir la búsqueda
+                agent.perceive()
+                if nearest is not None:
+                    agent.assign(nearest)
+                continue
+            agent.perceive()
+            agent.decide()
+        environment.agent_store.advance()
+        self.publish()
+
+        reply = {
+            'requests': station.requests,
+            'released': store.released,
+            'leaving': leaving,
+            'taken': environment.taken,
+            'available': len(environment.waste_index),
+            'path': path_counters(environment.pathfinder),
+            'seconds': time.process_time() - started,
+        }
+        station.requests = []
+        store.released = []
+        environment.taken = []
+        return reply
+
+    def handoff(self, gid, agent, budget):
+        """Shard al que traspasar un recolector libre (o None) y, si se queda, su residuo más cercano aquí"""
+        x, y = float(agent.x), float(agent.y)
+        fresh = gid in self.fresh
+        self.fresh.discard(gid)
+        here = self.layout.shard_of(x)
+        if not fresh and here != self.index and budget[here] > 0:
+            # Ha cruzado la frontera (p. ej. al entregar en un camión de otra franja)
+            return here, None
+        local = self.environment.waste_index.nearest(x, y)
+        if local is not None:
+            local_dist = math.hypot(local.x - x, local.y - y)
+            # Un residuo de la banda vecina está como poco a la distancia horizontal hasta la banda
+            if not fresh and self.band_gap(x) < local_dist:
+                ghost = self.ghosts.nearest(x, y)
+                if ghost is not None and math.hypot(ghost.x - x, ghost.y - y) < local_dist:
+                    target = self.layout.shard_of(ghost.x)
+                    if budget[target] > 0:
+                        return target, None
+            return None, local
+        others = [shard for shard, count in enumerate(budget) if count > 0 and shard != self.index]
+        if not others:
+            return None, None
+        return min(others, key=lambda shard: (abs(shard - self.index), shard)), None
+
+    def band_gap(self, x):
+        """Distancia horizontal desde x hasta la banda visible más próxima de los vecinos"""
+        left, right = self.layout.bounds(self.index)
+        gap = math.inf
+        if self.index > 0:
+            gap = max(left - self.margin - x, x - left, 0)
+        if self.index < self.layout.shards - 1:
+            gap = min(gap, max(right - x, x - right - self.margin, 0))
+        return gap
+
+    def adopt(self, record):
+        """Dar de alta un recolector (libre) llegado de otro shard o del reparto inicial"""
+        environment = self.environment
+        agent = CollectionAgent(record['x'], record['y'], environment, record['name'], speed=record['speed'],
+                                carry_capacity=record['carry_capacity'])
+        agent.deliveries = record['deliveries']
+        agent.state_ticks = record['state_ticks']
+        agent.state_since = record['state_since']
+        environment.agent_store.odometer[agent.slot] = record['travelled']
+        self.collectors[record['gid']] = agent
+        if record['fresh']:
+            self.fresh.add(record['gid'])
+
+    def release(self, gid):
+        """Sacar un recolector libre de este shard y devolver lo necesario para recrearlo en otro"""
+        agent = self.collectors.pop(gid)
+        store = self.environment.agent_store
+        record = {
+            'gid': gid,
+            'name': agent.name,
+            'x': float(agent.x),
+            'y': float(agent.y),
+            'speed': float(agent.speed),
+            'carry_capacity': agent.carry_capacity,
+            'deliveries': agent.deliveries,
+            'travelled': agent.distance_travelled,
+            'state_ticks': agent.state_ticks,
+            'state_since': agent.state_since,
+            'fresh': True,
+        }
+        store.moving[agent.slot] = False
+        store.free(agent.slot)
+        return record
+
+    def publish(self):
+        """Copiar a las columnas compartidas la posición, el estado y la carga de los recolectores propios"""
+        if not self.collectors:
+            return
+        columns = self.collector_block.arrays
+        agents = list(self.collectors.values())
+        gids = np.fromiter(self.collectors, dtype=np.int64, count=len(agents))
+        slots = np.fromiter((agent.slot for agent in agents), dtype=np.int64, count=len(agents))
+        store = self.environment.agent_store
+        columns['x'][gids] = store.x[slots]
+        columns['y'][gids] = store.y[slots]
+        columns['state'][gids] = [COLLECTOR_STATE_CODES[agent.state] for agent in agents]
+        columns['load'][gids] = [len(agent.collected_waste) for agent in agents]
+        columns['deliveries'][gids] = [agent.deliveries for agent in agents]
+        columns['travelled'][gids] = store.travelled_many(slots)
+
+    def close(self):
+        store = self.environment.waste_store
+        store.detach()
+        store.block.close()
+        self.collector_block.close()
+
+
+def serve(connection, config):
+    """Bucle de un proceso de shard: un mensaje por tick hasta recibir None"""
+    worker = None
+    try:
+        worker = ShardWorker(config)
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            connection.send(worker.step(message))
+    except Exception:
+        connection.send({'error': traceback.format_exc()})
+    finally:
+        if worker is not None:
+            worker.close()
+        connection.close()
+
+
+class CoordinatorEnvironment(CityEnvironment):
+    """Entorno del coordinador: camiones, centros y clasificación; los residuos solo se dan de alta.
+
+    Cada residuo nuevo se escribe en el bloque compartido y su fila se anota
+    para el shard dueño (y como banda visible para los vecinos cercanos), que
+    la recibe en la siguiente barrera.
+    """
+    def __init__(self, block, layout, margin, seed=None, log=None, grid_size=20, service_rate=None,
+                 queue_capacity=None, center_capacity=None):
+        super().__init__(num_points=0, seed=seed, log=log, grid_size=grid_size, service_rate=service_rate,
+                         queue_capacity=queue_capacity, center_capacity=center_capacity)
+        self.waste_store = SharedWasteStore(block)
+        self.layout = layout
+        self.margin = margin
+        self.spawns = [[] for _ in range(layout.shards)]  # Filas nuevas por shard dueño
+        self.ghost_spawns = [[] for _ in range(layout.shards)]  # Filas nuevas en la banda de cada shard
+
+    def add_waste(self, x, y, waste_type, weight=1):
+        """Crear un residuo en el bloque compartido y anotarlo para su shard; devuelve su fila"""
+        row = self.waste_store.add(x, y, waste_type, weight)
+        self.spawns[self.layout.shard_of(x)].append(row)
+        for shard in self.layout.ghost_shards(x, self.margin):
+            self.ghost_spawns[shard].append(row)
+        self.spawned_count += 1
+        self.revision += 1
+        return row
+
+    def pending_waste(self):
+        return self.spawned_count - self.collected_count
+
+
+class ShardedSimulation(Simulation):
+    """Simulación repartida en `shards` franjas verticales del mapa, una por proceso.
+
+    Es una `Simulation` sin pantalla cuya fase de recolectores corre en los
+    shards (`step`, `is_clear`, `is_done`); hay que cerrarla (`close` o bloque `with`) para parar los procesos y
+    liberar la memoria compartida. Es reproducible para una semilla y un
+    número de shards dados; con un solo shard da el mismo resultado que
+    `build_simulation` con reparto 'greedy'. Con varios, las entregas que
+    desbordan un camión (dos shards reservando su último hueco en el mismo
+    tick) se rechazan en la barrera y el recolector pide otro al tick
+    siguiente.
+    """
+    def __init__(self, environment, transport_agents, collectors, arrivals=None, start_method=None):
+        # Los recolectores viven en los shards; el coordinador solo ve sus columnas compartidas
+        super().__init__(environment, [], transport_agents, arrivals=arrivals)
+        layout = environment.layout
+        self.layout = layout
+        shards = layout.shards
+        self.collector_block = SharedBlock(COLLECTOR_COLUMNS, max(len(collectors), 1))
+        self.owner = {}  # Recolector (índice global) -> shard
+        self.arriving = [[] for _ in range(shards)]
+        for record in collectors:
+            shard = layout.shard_of(record['x'])
+            self.owner[record['gid']] = shard
+            self.arriving[shard].append(record)
+        self.rejected = [[] for _ in range(shards)]
+        self.taken = [[] for _ in range(shards)]  # Filas de la banda de cada shard que ya no están disponibles
+        self.available = [len(rows) for rows in environment.spawns]
+        self.path_counters = [(0,) * len(PATH_COUNTERS)] * shards
+        # Métricas
+        self.shard_seconds = [0.0] * shards  # Cómputo de cada shard entre barreras
+        self.critical_seconds = 0.0  # Suma por tick del shard más lento: lo que tarda la fase con un núcleo por shard
+        self.coordinator_seconds = 0.0  # Cómputo del coordinador (sin contar la espera en la barrera)
+        self.handoffs = 0  # Traspasos de recolectores entre shards
+        self.rejections = 0  # Entregas rechazadas por desbordar un camión
+
+        context = multiprocessing.get_context(start_method)
+        trucks = [(truck.home, truck.capacity) for truck in transport_agents]
+        self.connections = []
+        self.processes = []
+        self.waste_block = environment.waste_store.block  # Bloque de residuos que tienen abierto los shards
+        for index in range(shards):
+            parent, child = context.Pipe()
+            config = {
+                'index': index,
+                'shards': shards,
+                'margin': environment.margin,
+                'grid_size': environment.grid_size,
+                'cell_size': environment.index_cell_size(environment.spawned_count),
+                'waste': environment.waste_store.block.spec(),
+                'collectors': self.collector_block.spec(),
+                'trucks': trucks,
+            }
+            process = context.Process(target=serve, args=(child, config), name=f"shard-{index}", daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def run_tick(self):
+        """Un tick de `Simulation.run_tick`, contando el cómputo del coordinador"""
+        started = time.process_time()
+        super().run_tick()
+        self.coordinator_seconds += time.process_time() - started
+
+    def update_collectors(self, clock=None):
+        """Fase de los recolectores: un tick en cada shard hasta la barrera y sus peticiones aplicadas"""
+        environment = self.environment
+        trucks = [(truck.state, truck.current_load, truck.reserved_load) for truck in self.transport_agents]
+        store = environment.waste_store
+        resized = None
+        if store.block is not self.waste_block:
+            self.waste_block = store.block
+            resized = store.block.spec()
+        for shard, connection in enumerate(self.connections):
+            connection.send({
+                'tick': self.tick,
+                'waste': resized,
+                'trucks': trucks,
+                'spawn': environment.spawns[shard],
+                'ghosts': environment.ghost_spawns[shard],
+                'taken': self.taken[shard],
+                'arrive': self.arriving[shard],
+                'rejected': self.rejected[shard],
+                'available': self.available,
+            })
+            environment.spawns[shard] = []
+            environment.ghost_spawns[shard] = []
+            self.arriving[shard] = []
+            self.rejected[shard] = []
+            self.taken[shard] = []
+
+        # Barrera: todos los shards han terminado el tick
+        requests = []
+        slowest = 0.0
+        for shard, connection in enumerate(self.connections):
+            reply = connection.recv()
+            if 'error' in reply:
+                raise RuntimeError(f"Fallo en el shard {shard}:\n{reply['error']}")
+            requests.extend(reply['requests'])
+            store.free_slots.extend(reply['released'])
+            environment.collected_count += len(reply['released'])
+            self.available[shard] = reply['available']
+            self.path_counters[shard] = reply['path']
+            self.shard_seconds[shard] += reply['seconds']
+            slowest = max(slowest, reply['seconds'])
+            for neighbour, row in reply['taken']:
+                self.taken[neighbour].append(row)
+            for record, target in reply['leaving']:
+                self.owner[record['gid']] = target
+                self.arriving[target].append(record)
+                self.handoffs += 1
+        self.critical_seconds += slowest
+        if requests:
+            environment.revision += 1
+        requests.sort(key=lambda request: request[:2])
+        self.apply(requests)
+
+    def apply(self, requests):
+        """Aplicar a los camiones reales las reservas y entregas de los shards, por orden de recolector"""
+        store = self.environment.waste_store
+        trucks = self.transport_agents
+        for gid, _, kind, index, payload in requests:
+            truck = trucks[index]
+            if kind == 'reserve':
+                truck.reserved_load += payload
+            elif kind == 'release':
+                truck.reserved_load -= payload
+            elif kind == 'depart':
+                truck.request_departure()
+            elif not truck.receive_waste([WastePoint.detached(store, *item) for item in payload]):
+                self.rejected[self.owner[gid]].append(gid)
+                self.rejections += 1
+
+    def set_blocked(self, cells, blocked=True):
+        raise ValueError("Los cierres de celdas no se admiten en la simulación repartida")
+
+    def is_clear(self):
+        """Indica si ya no quedan residuos por recolectar en el mapa"""
+        return self.environment.pending_waste() == 0
+
+    def is_done(self):
+        """Todo recolectado y entregado, como `Simulation.is_done`"""
+        return (
+            (self.arrivals is None or self.arrivals.exhausted())
+            and self.is_clear()
+            and not any(self.rejected)
+            and not self.collector_block.arrays['load'].any()
+            and all(truck.state == 'waiting' and truck.current_load == 0 for truck in self.transport_agents)
+            and not any(agent.received_waste for agent in self.classification_agents)
+        )
+
+    def collector_column(self, name):
+        """Copia de una columna compartida de los recolectores (x, y, state, load, deliveries, travelled)"""
+        return self.collector_block.arrays[name].copy()
+
+    def path_stats(self):
+        """Contadores de búsqueda de rutas (PATH_COUNTERS) sumando coordinador y shards"""
+        totals = list(path_counters(self.environment.pathfinder))
+        for counters in self.path_counters:
+            for i, value in enumerate(counters):
+                totals[i] += value
+        return dict(zip(PATH_COUNTERS, totals))
+
+    def close(self):
+        """Parar los procesos de los shards y liberar la memoria compartida"""
+        if not self.processes:
+            return
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join()
+        for connection in self.connections:
+            connection.close()
+        self.processes = []
+        store = self.environment.waste_store
+        store.detach()
+        store.block.close(unlink=True)
+        self.collector_block.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_sharded_simulation(num_points=20, num_collectors=3, capacity=4, num_trucks=1, speed=2, grid_size=20,
+                             seed=None, log=None, arrivals=None, carry_capacity=1, shards=2, margin=MARGIN,
+                             waste_capacity=None, start_method=None, service_rate=None, queue_capacity=None,
+                             center_capacity=None):
+    """Construir una simulación repartida en `shards` procesos (el mismo mundo que `build_simulation`).
+
+    `waste_capacity` fija las filas iniciales del bloque compartido de
+    residuos (por defecto el doble de los iniciales más holgura para las
+    llegadas); si se llena se amplía al doble entre dos ticks. Solo admite
+    la cuadrícula y el reparto 'greedy'.
+    """
+    if shards < 1:
+        raise ValueError("Hace falta al menos un shard")
+    if not 1 <= carry_capacity <= capacity:
+        raise ValueError("La carga de un recolector debe estar entre 1 y la capacidad del camión")
+    check_classification(service_rate, queue_capacity, center_capacity)
+    if waste_capacity is not None and waste_capacity < 1:
+        raise ValueError("El bloque compartido de residuos necesita al menos una fila")
+    if waste_capacity is None:
+        waste_capacity = 2 * num_points + (4_096 if arrivals is not None else 0)
+    block = SharedBlock(WasteStore.columns, max(waste_capacity, num_points, 1))
+    layout = ShardLayout(shards)
+    environment = CoordinatorEnvironment(block, layout, margin, seed=seed, log=log, grid_size=grid_size,
+                                         service_rate=service_rate, queue_capacity=queue_capacity,
+                                         center_capacity=center_capacity)
+    # Mismo orden de sorteos que `build_simulation`: residuos y después recolectores
+    environment.generate_waste_points(num_points)
+    collectors = []
+    for i in range(num_collectors):
+        collectors.append({
+            'gid': i,
+            'name': f"CollectionAgent_{i + 1}",
+            'x': environment.rng.randint(50, WIDTH - 50),
+            'y': environment.rng.randint(50, HEIGHT - 50),
+            'speed': speed,
+            'carry_capacity': carry_capacity,
+            'deliveries': 0,
+            'travelled': 0.0,
+            'state_ticks': {},
+            'state_since': 0,
+            'fresh': False,
+        })
+    transport_agents = [
+        TransportAgent(x=x, y=y, environment=environment, capacity=capacity, name=f"TransportAgent_{i + 1}",
+                       speed=speed)
+        for i, (x, y) in enumerate(truck_homes(num_trucks))
+    ]
+    return ShardedSimulation(environment, transport_agents, collectors, arrivals=arrivals, start_method=start_method)
@@ -0,0 +1,239 @@
+"""Motor de simulación sin pantalla y fábrica explícita del mundo."""
+import math
+
+from .agents import CollectionAgent, TransportAgent
+from .assignment import BatchAssigner
+from .config import HEIGHT, WIDTH
+from .model import CityEnvironment
+from .scheduler import EventScheduler
+
+# Estrategias de reparto de residuos entre recolectores libres
+ASSIGNMENTS = ('greedy', 'batch')
+# Motores de avance: tick a tick o por eventos discretos (mismo resultado)
+ENGINES = ('tick', 'event')
+
+
+# Motor de simulación sin pantalla
+class Simulation:
+    """Avanza el entorno y los agentes con un paso de tiempo fijo, sin pantalla ni reloj"""
+    def __init__(self, environment, collection_agents, transport_agents, arrivals=None, assigner=None):
+        self.environment = environment
+        self.arrivals = arrivals  # Fuente de residuos nuevos en cada tick (p. ej. PoissonArrivals)
+        # Reparto conjunto de residuos a los recolectores libres (p. ej. BatchAssigner);
+        # sin él, cada recolector libre reserva el más cercano por orden de lista
+        self.assigner = assigner
+        self.collection_agents = collection_agents
+        self.transport_agents = transport_agents
+        self.classification_agents = environment.classification_agents
+        self.agents_by_slot = {agent.slot: agent for agent in collection_agents + transport_agents}
+        self.tick = 0
+        self.observers = []  # Pares (observador, cada cuántos ticks se llama)
+        self.profiler = None  # Instrumentación por tick (ver `residuos.profiling`); None no cuesta nada
+        self.scheduler = None  # Motor de eventos que salta los ticks sin actividad (ver `residuos.scheduler`)
+
+    def add_observer(self, observer, every=1):
+        """Registrar un observador (p. ej. el renderizador) que muestrea el estado cada `every` ticks"""
+        self.observers.append((observer, every))
+
+    def step(self, n=1, until=None):
+        """Avanzar la simulación `n` ticks, o hasta que `until(simulation)` sea cierto al cerrar un tick"""
+        if self.scheduler is not None:
+            return self.scheduler.step(self, n, until)
+        if self.profiler is not None:
+            return self.profiler.step(self, n, until)
+        for _ in range(n):
+            self.run_tick()
+            if until is not None and until(self):
+                break
+        return self.tick
+
+    def run_tick(self):
+        """Un tick completo, fase a fase.
+
+        El perfilador, el motor de eventos y la simulación repartida llaman a
+        estas mismas fases en este orden; un cambio de fase se hace aquí.
+        """
+        # Residuos que aparecen al comenzar el tick
+        self.spawn_arrivals()
+        self.assign_idle()
+        self.update_collectors()
+        self.update_trucks()
+        self.move_agents()
+        self.classify()
+        self.finish_tick()
+
+    def spawn_arrivals(self):
+        """Añadir los residuos que llegan en este tick"""
+        if self.arrivals is not None:
+            self.arrivals(self.environment, self.tick)
+
+    def assign_idle(self):
+        """Repartir a la vez los residuos disponibles entre los recolectores libres"""
+        if self.assigner is not None:
+            self.assigner(self.environment, self.collection_agents)
+
+    def update_collectors(self, clock=None):
+        """Percepción y decisión de los recolectores, por orden de lista.
+
+        Con `clock` (p. ej. `time.perf_counter`) mide por separado ambas
+        partes y devuelve los segundos de (perceive, decide).
+        """
+        if clock is None:
+            for agent in self.collection_agents:
+                agent.perceive()
+                agent.decide()
+            return None
+        perceive = decide = 0.0
+        for agent in self.collection_agents:
+            before = clock()
+            agent.perceive()
+            perceived = clock()
+            agent.decide()
+            decide += clock() - perceived
+            perceive += perceived - before
+        return perceive, decide
+
+    def update_trucks(self):
+        """Percepción de los camiones, por orden de lista"""
+        for transport_agent in self.transport_agents:
+            transport_agent.perceive()
+
+    def move_agents(self, ticks=1):
+        """Avanzar en una sola pasada a todos los agentes en desplazamiento"""
+        self.environment.agent_store.advance(ticks=ticks)
+
+    def classify(self):
+        """Clasificar lo recibido por cada agente de clasificación"""
+        for classification_agent in self.classification_agents:
+            classification_agent.classify_waste()
+
+    def finish_tick(self):
+        """Cerrar el tick y avisar a los observadores que toque"""
+        self.tick += 1
+        self.environment.tick = self.tick
+        self.environment.log.tick = self.tick
+        for observer, every in self.observers:
+            if self.tick % every == 0:
+                observer(self)
+
+    def set_blocked(self, cells, blocked=True):
+        """Cerrar (o reabrir) celdas de la cuadrícula y reparar las rutas afectadas.
+
+        Solo se reparan los agentes cuya ruta pendiente atraviesa una celda
+        cerrada y los que estaban detenidos sin camino; el resto conserva su
+        ruta. Devuelve el número de rutas reparadas.
+        """
+        environment = self.environment
+        grid = environment.grid
+        if grid is None:
+            raise ValueError("Los cierres de celdas solo se admiten sobre la cuadrícula")
+        changed = grid.set_blocked(cells, blocked)
+        if not changed:
+            return 0
+        affected = set(environment.stalled_agents)
+        if blocked:
+            flat = [y * grid.cols + x for x, y in changed]
+            slots = environment.agent_store.paths_through(grid.cell_size, grid.cols, flat)
+            affected.update(self.agents_by_slot[slot] for slot in slots.tolist())
+        # Orden estable para que la simulación siga siendo reproducible
+        for agent in sorted(affected, key=lambda agent: agent.slot):
+            agent.repair_path()
+        return len(affected)
+
+    def is_clear(self):
+        """Indica si ya no quedan residuos por recolectar en el mapa"""
+        return not self.environment.waste_points
+
+    def is_done(self):
+        """Todo recolectado y entregado: nadie con residuos encima y camiones vacíos en su base"""
+        return (
+            (self.arrivals is None or self.arrivals.exhausted())
+            and self.is_clear()
+            and not any(agent.collected_waste for agent in self.collection_agents)
+            and all(truck.state == 'waiting' and truck.current_load == 0 for truck in self.transport_agents)
+            and not any(agent.received_waste for agent in self.classification_agents)
+        )
+
+
+def check_classification(service_rate, queue_capacity, center_capacity=None):
+    """Validar el ritmo de servicio y el tamaño de cola de los clasificadores y la capacidad de los centros"""
+    if service_rate is not None and service_rate <= 0:
+        raise ValueError("El ritmo de clasificación debe ser positivo")
+    if queue_capacity is not None and queue_capacity < 1:
+        raise ValueError("La cola de clasificación debe admitir al menos un residuo")
+    if center_capacity is not None and center_capacity < 1:
+        raise ValueError("Los centros deben admitir al menos un residuo")
+
+
+def truck_homes(num_trucks):
+    """Posiciones de espera de la flota; con un camión, el centro del mapa"""
+    cols = math.ceil(math.sqrt(num_trucks))
+    rows = math.ceil(num_trucks / cols)
+    homes = []
+    for i in range(num_trucks):
+        row, col = divmod(i, cols)
+        x = WIDTH * (col + 1) // (cols + 1)
+        y = HEIGHT // 2 + row * (HEIGHT // 2 - 50) // max(rows - 1, 1)
+        homes.append((x, y))
+    return homes
+
+
+def build_simulation(num_points=20, num_collectors=3, capacity=4, num_trucks=1, speed=2, grid_size=20,
+                     seed=None, log=None, road_network=None, arrivals=None, assignment='greedy', carry_capacity=1,
+                     engine='tick', service_rate=None, queue_capacity=None, center_capacity=None):
+    """Construir el entorno y los agentes de una simulación (reproducible si se da `seed`).
+
+    Con `road_network` (una `RoadNetwork` en coordenadas del mapa) los agentes
+    circulan por la red viaria en lugar de por la cuadrícula. Con `arrivals`
+    (p. ej. `PoissonArrivals`) siguen apareciendo residuos durante la simulación.
+    Con `assignment='batch'` los residuos se reparten en lote entre los
+    recolectores libres en lugar de que cada uno reserve el más cercano.
+    Con `carry_capacity` > 1 cada recolector recoge varios residuos en un
+    recorrido antes de volver al camión. Con `engine='event'` la simulación
+    avanza por eventos discretos y salta los ticks en los que nadie decide nada.
+    Con `service_rate` cada clasificador atiende como mucho ese número de
+    residuos por tick y con `queue_capacity` su cola tiene ese tamaño; los
+    camiones esperan en el centro mientras no haya sitio. `center_capacity`
+    sustituye la capacidad por defecto de los centros.
+    """
+    if assignment not in ASSIGNMENTS:
+        raise ValueError(f"Asignación desconocida: {assignment!r} (opciones: {', '.join(ASSIGNMENTS)})")
+    if not 1 <= carry_capacity <= capacity:
+        raise ValueError("La carga de un recolector debe estar entre 1 y la capacidad del camión")
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+    check_classification(service_rate, queue_capacity, center_capacity)
+    environment = CityEnvironment(num_points=num_points, seed=seed, log=log, grid_size=grid_size,
+                                  road_network=road_network, service_rate=service_rate,
+                                  queue_capacity=queue_capacity, center_capacity=center_capacity)
+
+    # Crear agentes de recolección
+    collection_agents = []
+    for i in range(num_collectors):
+        agent = CollectionAgent(
+            x=environment.rng.randint(50, WIDTH - 50),
+            y=environment.rng.randint(50, HEIGHT - 50),
+            environment=environment,
+            name=f"CollectionAgent_{i + 1}",
+            speed=speed,
+            carry_capacity=carry_capacity
+        )
+        collection_agents.append(agent)
+
+    # Flota de camiones; el primero se ubica en el centro del mapa
+    transport_agents = [
+        TransportAgent(
+            x=x,
+            y=y,
+            environment=environment,
+            capacity=capacity,  # Capacidad máxima de residuos
+            name=f"TransportAgent_{i + 1}",
+            speed=speed
+        )
+        for i, (x, y) in enumerate(truck_homes(num_trucks))
+    ]
+    assigner = BatchAssigner() if assignment == 'batch' else None
+    simulation = Simulation(environment, collection_agents, transport_agents, arrivals=arrivals, assigner=assigner)
+    if engine == 'event':
+        simulation.scheduler = EventScheduler()
+    return simulation
@@ -0,0 +1,105 @@
+"""Índice espacial de puntos de residuos para consultas de vecino más cercano."""
+import math
+
+
+class WasteIndex:
+    """Cuadrícula uniforme de cubetas con los residuos disponibles (ni recolectados ni reservados).
+
+    Se actualiza de forma incremental al reservar, recolectar o generar
+    residuos; la búsqueda del más cercano recorre anillos de cubetas
+    alrededor de la consulta y se detiene en cuanto ningún anillo más
+    lejano puede mejorar el resultado.
+    """
+    def __init__(self, width, height, cell_size=50):
+        self.cell_size = cell_size
+        self.cols = max(1, -(-width // cell_size))
+        self.rows = max(1, -(-height // cell_size))
+        self.buckets = {}  # (columna, fila) -> {punto: None}, conserva el orden de inserción
+        self.count = 0
+
+    def bucket_of(self, x, y):
+        col = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        row = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return (col, row)
+
+    def add(self, point):
+        bucket = self.buckets.setdefault(self.bucket_of(point.x, point.y), {})
+        if point not in bucket:
+            bucket[point] = None
+            self.count += 1
+
+    def remove(self, point):
+        key = self.bucket_of(point.x, point.y)
+        bucket = self.buckets.get(key)
+        if bucket is not None and point in bucket:
+            del bucket[point]
+            self.count -= 1
+            if not bucket:
+                del self.buckets[key]
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, point):
+        bucket = self.buckets.get(self.bucket_of(point.x, point.y))
+        return bucket is not None and point in bucket
+
+    def _ring(self, col, row, radius):
+        """Cubetas no vacías a distancia de Chebyshev exactamente `radius`"""
+        buckets = self.buckets
+        if radius == 0:
+            bucket = buckets.get((col, row))
+            if bucket:
+                yield bucket
+            return
+        for c in range(col - radius, col + radius + 1):
+            for r in (row - radius, row + radius):
+                bucket = buckets.get((c, r))
+                if bucket:
+                    yield bucket
+        for r in range(row - radius + 1, row + radius):
+            for c in (col - radius, col + radius):
+                bucket = buckets.get((c, r))
+                if bucket:
+                    yield bucket
+
+    def nearest(self, x, y):
+        """Punto disponible más cercano (distancia euclídea), o None si no hay ninguno"""
+        if not self.count:
+            return None
+        col, row = self.bucket_of(x, y)
+        max_radius = max(col, self.cols - 1 - col, row, self.rows - 1 - row)
+        best = None
+        best_dist = math.inf
+        for radius in range(max_radius + 1):
+            for bucket in self._ring(col, row, radius):
+                for point in bucket:
+                    dist = math.hypot(point.x - x, point.y - y)
+                    if dist < best_dist:
+                        best = point
+                        best_dist = dist
+            # Cualquier punto de un anillo más lejano está al menos a radius * cell_size
+            if best_dist <= radius * self.cell_size:
+                break
+        return best
+
+    def k_nearest(self, x, y, k):
+        """Los `k` puntos disponibles más cercanos (o todos si hay menos), de menor a mayor distancia"""
+        if not self.count or k <= 0:
+            return []
+        col, row = self.bucket_of(x, y)
+        max_radius = max(col, self.cols - 1 - col, row, self.rows - 1 - row)
+        found = []  # (distancia, orden de visita, punto): el orden desempata sin comparar puntos
+        visited = 0
+        for radius in range(max_radius + 1):
+            for bucket in self._ring(col, row, radius):
+                for point in bucket:
+                    found.append((math.hypot(point.x - x, point.y - y), visited, point))
+                    visited += 1
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                if found[-1][0] <= radius * self.cell_size:
+                    break
+        found.sort()
+        return [point for _, _, point in found[:k]]
@@ -0,0 +1,252 @@
+"""Almacenamiento en columnas (structure of arrays) de residuos y agentes móviles."""
+import numpy as np
+
+# Tipos de residuo y su código numérico en las columnas
+WASTE_TYPES = ('orgánico', 'inorgánico', 'otro')
+WASTE_TYPE_CODES = {waste_type: code for code, waste_type in enumerate(WASTE_TYPES)}
+
+
+class ColumnStore:
+    """Columnas NumPy contiguas que crecen por duplicación"""
+    columns = {}  # nombre -> dtype, definido por cada subclase
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.free_slots = []  # Filas liberadas, reutilizadas antes de crecer
+        for name, dtype in self.columns.items():
+            setattr(self, name, np.zeros(max(capacity, 1), dtype=dtype))
+
+    @property
+    def capacity(self):
+        return len(getattr(self, next(iter(self.columns))))
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name in self.columns:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _append(self, **values):
+        if self.free_slots:
+            index = self.free_slots.pop()
+            for name in self.columns:
+                getattr(self, name)[index] = 0
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            index = self.size
+            self.size += 1
+        for name, value in values.items():
+            getattr(self, name)[index] = value
+        return index
+
+    def free(self, index):
+        """Liberar una fila para reutilizarla en el siguiente alta"""
+        self.free_slots.append(index)
+
+    @property
+    def live(self):
+        """Filas en uso (sin contar las liberadas)"""
+        return self.size - len(self.free_slots)
+
+    def __len__(self):
+        return self.size
+
+    def nbytes(self):
+        """Memoria ocupada por las filas en uso"""
+        return sum(getattr(self, name)[:self.size].nbytes for name in self.columns)
+
+
+class WasteStore(ColumnStore):
+    """Posición, tipo, peso y banderas de todos los residuos"""
+    columns = {
+        'x': np.int32,
+        'y': np.int32,
+        'type_code': np.uint8,
+        'weight': np.float32,
+        'collected': np.bool_,
+        'reserved': np.bool_,
+    }
+
+    def add(self, x, y, waste_type, weight):
+        """Añadir un residuo y devolver su índice"""
+        return self._append(x=x, y=y, type_code=WASTE_TYPE_CODES[waste_type], weight=weight)
+
+    def distances_to(self, x, y):
+        """Distancia euclídea de todos los residuos a un punto, en una sola operación"""
+        return np.hypot(self.x[:self.size] - x, self.y[:self.size] - y)
+
+
+class AgentStore(ColumnStore):
+    """Posición, velocidad y ruta de los agentes móviles.
+
+    Las rutas se guardan en matrices de waypoints preasignadas (una fila por
+    agente) y se recorren con un cursor, de modo que `advance` mueve a todos
+    los agentes en una sola pasada de NumPy sin listas de Python.
+
+    Un tramo de longitud L se recorre en floor(L / velocidad) pasos completos
+    más un tick final en el que se salta al waypoint. Al fijar la ruta se
+    guardan, por waypoint, el paso del tramo y los ticks y la distancia
+    acumulados hasta él; la posición se calcula desde el inicio del tramo y
+    los ticks andados, así que avanzar k ticks de una vez da exactamente lo
+    mismo que k ticks sueltos y el tick de llegada se conoce de antemano.
+    """
+    columns = {
+        'x': np.float64,
+        'y': np.float64,
+        'speed': np.float64,
+        'moving': np.bool_,  # El estado del agente implica desplazarse
+        'path_pos': np.int32,  # Cursor al siguiente waypoint
+        'path_len': np.int32,  # Número de waypoints de la ruta actual
+        'elapsed': np.int64,  # Ticks andados en la ruta actual
+        'odometer': np.float64,  # Distancia recorrida antes de la ruta actual
+        'seg_x': np.float64,  # Inicio del tramo actual
+        'seg_y': np.float64,
+        'seg_base': np.int64,  # Ticks de ruta al empezar el tramo actual
+        'step_x': np.float64,  # Desplazamiento de un paso en el tramo actual
+        'step_y': np.float64,
+        'wp_x': np.float64,
+        'wp_y': np.float64,
+        'wp_step_x': np.float64,  # Paso del tramo que termina en cada waypoint
+        'wp_step_y': np.float64,
+        'wp_ticks': np.int64,  # Ticks acumulados al alcanzar cada waypoint
+        'wp_dist': np.float64,  # Distancia acumulada al alcanzar cada waypoint
+    }
+    # Columnas con una fila de waypoints por agente
+    path_columns = ('wp_x', 'wp_y', 'wp_step_x', 'wp_step_y', 'wp_ticks', 'wp_dist')
+
+    def __init__(self, capacity=64, path_capacity=64):
+        super().__init__(capacity)
+        for name in self.path_columns:
+            setattr(self, name, np.zeros((self.capacity, path_capacity), dtype=self.columns[name]))
+
+    def add(self, x, y, speed):
+        """Registrar un agente y devolver su índice"""
+        return self._append(x=x, y=y, speed=speed)
+
+    def set_path(self, slot, waypoints):
+        """Sustituir la ruta de un agente y reiniciar su cursor"""
+        # Lo andado en la ruta abandonada pasa al odómetro
+        self.odometer[slot] = self.travelled(slot)
+        length = len(waypoints)
+        width = self.wp_x.shape[1]
+        if length > width:
+            width = max(length, width * 2)
+            for name in self.path_columns:
+                old = getattr(self, name)
+                new = np.zeros((old.shape[0], width), dtype=old.dtype)
+                new[:, :old.shape[1]] = old
+                setattr(self, name, new)
+        x, y, speed = self.x[slot], self.y[slot], self.speed[slot]
+        if length:
+            points = np.asarray(waypoints, dtype=np.float64)
+            dx = np.diff(points[:, 0], prepend=x)
+            dy = np.diff(points[:, 1], prepend=y)
+            distance = np.hypot(dx, dy)
+            scale = np.divide(speed, distance, out=np.zeros_like(distance), where=distance > 0)
+            self.wp_x[slot, :length] = points[:, 0]
+            self.wp_y[slot, :length] = points[:, 1]
+            self.wp_step_x[slot, :length] = dx * scale
+            self.wp_step_y[slot, :length] = dy * scale
+            self.wp_ticks[slot, :length] = np.cumsum(np.floor(distance / speed).astype(np.int64) + 1)
+            self.wp_dist[slot, :length] = np.cumsum(distance)
+        self.path_pos[slot] = 0
+        self.path_len[slot] = length
+        self.elapsed[slot] = 0
+        self.seg_x[slot] = x
+        self.seg_y[slot] = y
+        self.seg_base[slot] = 0
+        self.step_x[slot] = self.wp_step_x[slot, 0] if length else 0.0
+        self.step_y[slot] = self.wp_step_y[slot, 0] if length else 0.0
+
+    def remaining_path(self, slot):
+        """Waypoints aún no alcanzados, como lista de tuplas"""
+        start, end = self.path_pos[slot], self.path_len[slot]
+        return list(zip(self.wp_x[slot, start:end].tolist(), self.wp_y[slot, start:end].tolist()))
+
+    def has_path(self, slot):
+        return self.path_pos[slot] < self.path_len[slot]
+
+    def travelled(self, slot):
+        """Distancia total recorrida, incluido lo andado en el tramo actual"""
+        cursor = self.path_pos[slot]
+        done = self.wp_dist[slot, cursor - 1] if cursor else 0.0
+        return float(self.odometer[slot] + done + (self.elapsed[slot] - self.seg_base[slot]) * self.speed[slot])
+
+    def travelled_many(self, index):
+        """Distancia total recorrida por varios agentes, como `travelled` en una sola operación"""
+        cursor = self.path_pos[index]
+        done = np.where(cursor > 0, self.wp_dist[index, np.maximum(cursor - 1, 0)], 0.0)
+        return self.odometer[index] + done + (self.elapsed[index] - self.seg_base[index]) * self.speed[index]
+
+    def ticks_to_arrive(self, slot):
+        """Ticks de desplazamiento que le faltan a un agente para terminar su ruta"""
+        end = self.path_len[slot]
+        if self.path_pos[slot] >= end:
+            return 0
+        return int(self.wp_ticks[slot, end - 1] - self.elapsed[slot])
+
+    def start_segments(self, index):
+        """Fijar el tramo actual de agentes que acaban de alcanzar un waypoint (cursor >= 1)"""
+        cursor = self.path_pos[index]
+        previous = cursor - 1
+        self.seg_x[index] = self.wp_x[index, previous]
+        self.seg_y[index] = self.wp_y[index, previous]
+        self.seg_base[index] = self.wp_ticks[index, previous]
+        pending = cursor < self.path_len[index]
+        current = np.where(pending, cursor, previous)
+        self.step_x[index] = np.where(pending, self.wp_step_x[index, current], 0.0)
+        self.step_y[index] = np.where(pending, self.wp_step_y[index, current], 0.0)
+
+    def advance(self, index=None, ticks=1):
+        """Avanzar `ticks` ticks a los agentes indicados (por defecto, todos los que se desplazan)"""
+        n = self.size
+        if index is None:
+            index = np.flatnonzero(self.moving[:n] & (self.path_pos[:n] < self.path_len[:n]))
+        else:
+            index = index[self.path_pos[index] < self.path_len[index]]
+        if not len(index):
+            return
+        cursor = self.path_pos[index]
+        elapsed = self.elapsed[index] + ticks
+        if ticks == 1:
+            reached = elapsed == self.wp_ticks[index, cursor]
+            cursor = cursor + reached
+        else:
+            # Waypoints alcanzados en el salto, sin pasar del final de la ruta
+            length = self.path_len[index]
+            elapsed = np.minimum(elapsed, self.wp_ticks[index, length - 1])
+            width = int(length.max())
+            column = np.arange(width)
+            behind = (self.wp_ticks[index, :width] <= elapsed[:, None]) & (column < length[:, None])
+            reached_cursor = behind.sum(axis=1).astype(cursor.dtype)
+            reached = reached_cursor != cursor
+            cursor = reached_cursor
+        self.elapsed[index] = elapsed
+        if reached.any():
+            hit = index[reached]
+            self.path_pos[hit] = cursor[reached]
+            self.start_segments(hit)
+        steps = elapsed - self.seg_base[index]
+        self.x[index] = self.seg_x[index] + self.step_x[index] * steps
+        self.y[index] = self.seg_y[index] + self.step_y[index] * steps
+
+    def paths_through(self, cell_size, cols, cells):
+        """Agentes cuya ruta pendiente pasa por alguna de las celdas dadas (índices planos fila * cols + columna)"""
+        n = self.size
+        width = self.wp_x.shape[1]
+        column = np.arange(width)
+        pending = (column >= self.path_pos[:n, None]) & (column < self.path_len[:n, None])
+        flat = (self.wp_y[:n] // cell_size).astype(np.int64) * cols + (self.wp_x[:n] // cell_size).astype(np.int64)
+        hit = pending & np.isin(flat, np.asarray(list(cells), dtype=np.int64))
+        return np.flatnonzero(hit.any(axis=1))
+
+    def positions(self):
+        """Matriz (n, 2) con las posiciones actuales"""
+        return np.column_stack((self.x[:self.size], self.y[:self.size]))
+
+    def distances_to(self, x, y):
+        """Distancia euclídea de todos los agentes a un punto, en una sola operación"""
+        return np.hypot(self.x[:self.size] - x, self.y[:self.size] - y)
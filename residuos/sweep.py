@@ -0,0 +1,129 @@
+"""Barrido de parámetros en paralelo para dimensionar la flota.
+
+Cada configuración se simula sin pantalla y con semilla en un proceso del
+pool; los resultados se agregan en una tabla por columnas (CSV o .npz):
+
+    python -m residuos.sweep --points 200 1000 --collectors 5 20 --capacity 4 16 \\
+        --trucks 1 2 --seeds 3 --out resultados.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .simulation import build_simulation
+
+# Parámetros de build_simulation que se pueden barrer
+PARAMETERS = ('num_points', 'num_collectors', 'capacity', 'num_trucks', 'speed', 'grid_size')
+IDLE_STATES = ('idle', 'waiting_for_truck')
+
+
+def expand_grid(grid, seeds=1, max_ticks=50_000):
+    """Producto cartesiano de los valores de cada parámetro, repetido por semilla"""
+    names = [name for name in PARAMETERS if name in grid]
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        for seed in range(seeds):
+            config = dict(zip(names, values))
+            config.update(seed=seed, max_ticks=max_ticks)
+            configs.append(config)
+    return configs
+
+
+def run_config(config):
+    """Simular una configuración hasta terminar (o hasta max_ticks) y devolver sus métricas"""
+    params = dict(config)
+    max_ticks = params.pop('max_ticks')
+    started = time.perf_counter()
+    simulation = build_simulation(**params)
+    done = simulation.is_done()
+    if not done:
+        # Se avanza de una vez y se para al cerrar el tick en que termina
+        simulation.step(max_ticks - simulation.tick, until=type(simulation).is_done)
+        done = simulation.is_done()
+
+    collectors = simulation.collection_agents
+    trucks = simulation.transport_agents
+    collector_ticks = [agent.state_durations() for agent in collectors]
+    idle_ticks = sum(ticks.get(state, 0) for ticks in collector_ticks for state in IDLE_STATES)
+    total_ticks = simulation.tick * len(collectors)
+
+    row = dict(config)
+    row.update(
+        completed=done,
+        makespan=simulation.tick if done else -1,
+        ticks=simulation.tick,
+        collected=simulation.environment.collected_count,
+        collector_idle_ticks=idle_ticks,
+        collector_idle_fraction=idle_ticks / total_ticks if total_ticks else 0.0,
+        collector_distance=sum(agent.distance_travelled for agent in collectors),
+        truck_distance=sum(truck.distance_travelled for truck in trucks),
+        truck_trips=sum(truck.trips for truck in trucks),
+        wall_time=time.perf_counter() - started,
+    )
+    return row
+
+
+def run_sweep(configs, workers=None, chunksize=None):
+    """Repartir las configuraciones entre todos los núcleos y devolver las filas en orden"""
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(configs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_config, configs, chunksize=chunksize))
+
+
+def to_columns(rows):
+    """Convertir filas (diccionarios) en columnas de NumPy"""
+    names = list(rows[0]) if rows else []
+    return {name: np.array([row[name] for row in rows]) for name in names}
+
+
+def write_results(rows, path):
+    """Guardar la tabla en CSV o, con extensión .npz, como columnas de NumPy"""
+    if path.endswith('.npz'):
+        np.savez(path, **to_columns(rows))
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[20])
+    parser.add_argument('--collectors', type=int, nargs='+', default=[3])
+    parser.add_argument('--capacity', type=int, nargs='+', default=[4])
+    parser.add_argument('--trucks', type=int, nargs='+', default=[1])
+    parser.add_argument('--speed', type=float, nargs='+', default=[2])
+    parser.add_argument('--grid-size', type=int, nargs='+', default=[20])
+    parser.add_argument('--seeds', type=int, default=1, help='repeticiones con semillas 0..n-1')
+    parser.add_argument('--max-ticks', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, default=None, help='procesos (por defecto, todos los núcleos)')
+    parser.add_argument('--out', default='sweep.csv', help='fichero de resultados (.csv o .npz)')
+    args = parser.parse_args(argv)
+
+    grid = {
+        'num_points': args.points,
+        'num_collectors': args.collectors,
+        'capacity': args.capacity,
+        'num_trucks': args.trucks,
+        'speed': args.speed,
+        'grid_size': args.grid_size,
+    }
+    configs = expand_grid(grid, seeds=args.seeds, max_ticks=args.max_ticks)
+    started = time.perf_counter()
+    rows = run_sweep(configs, workers=args.workers)
+    write_results(rows, args.out)
+    print(f"{len(rows)} configuraciones en {time.perf_counter() - started:.1f}s -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())